@@ -1,24 +1,104 @@
-def backward_chain(self, query):
-        print(f"Attempting to derive: {query}")
-        if query in self.inferred:  # Check if the query is already a known fact
-            print(f"{query} is already inferred")
-            if query not in self.derived_order:
-                self.derived_order.append(query)
+import stats
+import tracing
+
+def backward_chain(self, query):  # Prove query from the rules concluding it, using an explicit stack instead of recursion
+    ordered = set(self.derived_order)  # Membership of derived_order without scanning the list
+    failed = set()  # Goals that cannot be derived, whatever the rest of the proof does
+    on_stack = {}  # Goal -> depth of the frame currently trying to derive it
+    tentative = {}  # Goal that failed while relying on an unfinished goal -> (its depth, its frame, proofs then)
+    proofs = 0  # Goals derived so far; a derivation can undo a tentative failure
+    trace = tracing.tracer(tracing.INFO)
+    debug = tracing.tracer(tracing.DEBUG)
+    collected = stats.current
+    memo_hits = tried = 0
+
+    def record(symbol):
+        if symbol not in ordered:
+            ordered.add(symbol)
+            self.derived_order.append(symbol)
+
+    def enter(goal):  # Returns True/False for goals settled without a new frame, else pushes a frame and returns None
+        nonlocal memo_hits
+        if debug is not None:
+            debug(tracing.GOAL_ATTEMPTED, goal=self.symbols.name(goal))
+        if goal in self.inferred:  # Check if the goal is already a known fact
+            if debug is not None:
+                debug(tracing.GOAL_PROVEN, goal=self.symbols.name(goal), premises=None)
+            record(goal)
+            memo_hits += 1
             return True
+        if goal in failed:
+            memo_hits += 1
+            return False
+        if goal in tentative:
+            low, frame, proved = tentative[goal]
+            # The failure still holds while nothing new was derived and the goals it relied on are unfinished
+            if proved == proofs and low < len(stack) and stack[low] is frame:
+                stack[-1]['low'] = min(stack[-1]['low'], low)
+                memo_hits += 1
+                return False
+            del tentative[goal]
+        if goal in on_stack:  # A cycle: the goal is already being derived further down the stack
+            stack[-1]['low'] = min(stack[-1]['low'], on_stack[goal])
+            return False
+        on_stack[goal] = len(stack)
+        stack.append({'goal': goal, 'rules': self.conclusion_index.get(goal, []), 'rule': -1,
+                      'premises': [], 'next': 0, 'low': len(stack)})
+        return None
 
-        for premises, conclusion in self.clauses:  # Checks if there are any rules that can conclude query
-            if conclusion == query:
-                print(f"Found rule: {premises} => {conclusion}")
-                if all(self.backward_chain(prem) for prem in premises):  # Checks if all premises can be derived
-                    self.inferred.add(query)
-                    print(f"Derived {query} from {premises}")
-                    for prem in premises:
-                        if prem not in self.initial_facts and prem not in self.derived_order:
-                            self.derived_order.append(prem)
-                    if query not in self.derived_order:
-                        self.derived_order.append(query) # Adds the query to the order list
-                    return True
-                else:
-                    print(f"Failed to derive all premises for {query}")
-        print(f"Failed to derive {query}")
-        return False
\ No newline at end of file
+    stack = []
+    result = enter(query)
+    while stack:
+        frame = stack[-1]
+        if result is False or frame['next'] == len(frame['premises']):
+            if result is not False and frame['rule'] >= 0:  # Every premise of the current rule was derived
+                goal, premises = frame['goal'], frame['premises']
+                self.inferred.add(goal)
+                if trace is not None:
+                    trace(tracing.GOAL_PROVEN, goal=self.symbols.name(goal), premises=self.names(premises))
+                for prem in premises:
+                    if prem not in self.initial_facts:
+                        record(prem)
+                record(goal)  # Adds the goal to the order list
+                proofs += 1
+                stack.pop()
+                del on_stack[goal]
+                result = True
+                continue
+            if frame['rule'] >= 0 and debug is not None:
+                debug(tracing.GOAL_FAILED, goal=self.symbols.name(frame['goal']), premises=self.names(frame['premises']))
+            frame['rule'] += 1  # Move on to the next rule concluding the goal
+            if frame['rule'] == len(frame['rules']):
+                goal = frame['goal']
+                if trace is not None:
+                    trace(tracing.GOAL_FAILED, goal=self.symbols.name(goal), premises=None)
+                stack.pop()
+                del on_stack[goal]
+                if frame['low'] >= len(stack):  # Only cache failures that did not rely on an unfinished goal
+                    failed.add(goal)
+                    # Every goal this one waited on has failed too, so the failures that relied on them
+                    # stand, unless a goal was derived after them and may have made them derivable
+                    for other, (low, _, proved) in list(tentative.items()):
+                        if low >= len(stack):
+                            if proved == proofs:
+                                failed.add(other)
+                            del tentative[other]
+                elif stack:
+                    stack[-1]['low'] = min(stack[-1]['low'], frame['low'])
+                    tentative[goal] = (frame['low'], stack[frame['low']], proofs)
+                result = False
+                continue
+            premises = self.clauses.premises_of(frame['rules'][frame['rule']])
+            tried += 1
+            if debug is not None:
+                debug(tracing.RULE_TRIED, goal=self.symbols.name(frame['goal']), premises=self.names(premises))
+            frame['premises'] = list(premises)
+            frame['next'] = 0
+            result = None
+            continue
+        prem = frame['premises'][frame['next']]
+        frame['next'] += 1
+        result = enter(prem)
+    if collected is not None:
+        collected.add(clauses_scanned=tried, rules_fired=proofs, goals_memo_hit=memo_hits)
+    return result
\ No newline at end of file
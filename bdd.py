@@ -0,0 +1,211 @@
+import struct
+import sys
+from array import array
+from logic import is_atom
+
+# Reduced ordered binary decision diagrams (ROBDD)
+# Nodes are ints indexing parallel var/low/high lists; 0 and 1 are the FALSE and TRUE terminals.
+# Variables are symbol ids and are ordered by id. The unique table keeps the diagram reduced and
+# shared, and the computed table caches every ite(f, g, h), so building and querying a compiled KB
+# costs time polynomial in the size of the diagram rather than in the number of models.
+# A compiled KB is saved as a header, the symbol names and the exported nodes as little-endian int
+# triples, so loading one only reads numbers and text.
+
+FALSE, TRUE = 0, 1
+TERMINAL = float('inf')  # Variable of the terminals, below every real variable
+MAGIC = b'KBBDD\0\0\0'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<8sI32sIII')  # magic, version, source hash, root, bytes of symbol names, rows
+
+
+class BDD:
+    def __init__(self):
+        self.var = [TERMINAL, TERMINAL]
+        self.low = [FALSE, TRUE]
+        self.high = [FALSE, TRUE]
+        self.unique = {}  # (var, low, high) -> node
+        self.computed = {}  # (f, g, h) -> ite(f, g, h)
+
+    def node(self, var, low, high):
+        if low == high:
+            return low  # Redundant test
+        key = (var, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.var)
+            self.var.append(var)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = node
+        return node
+
+    def variable(self, var):
+        return self.node(var, FALSE, TRUE)
+
+    def cofactors(self, f, var):
+        if self.var[f] == var:
+            return self.low[f], self.high[f]
+        return f, f
+
+    def settled(self, f, g, h):  # ite(f, g, h) when it is a terminal case or already computed, else None
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+        return self.computed.get((f, g, h))
+
+    def ite(self, f, g, h):  # If f then g else h, expanded one variable level at a time on an explicit stack
+        stack = []  # [(f, g, h), var, arguments of the high branch, low node once built]
+        args = (f, g, h)
+        while True:
+            result = self.settled(*args)
+            if result is None:
+                var = min(self.var[arg] for arg in args)
+                (f0, f1), (g0, g1), (h0, h1) = (self.cofactors(arg, var) for arg in args)
+                stack.append([args, var, (f1, g1, h1), None])
+                args = (f0, g0, h0)
+                continue
+            while stack:  # Hand the result to the frame waiting on it
+                frame = stack[-1]
+                if frame[3] is None:
+                    frame[3] = result
+                    args = frame[2]
+                    break
+                stack.pop()
+                result = self.node(frame[1], frame[3], result)
+                self.computed[frame[0]] = result
+            else:
+                return result
+
+    def negate(self, f):
+        return self.ite(f, FALSE, TRUE)
+
+    def conjoin(self, f, g):
+        return self.ite(f, g, FALSE)
+
+    def conjoin_all(self, nodes):  # Conjunction of nodes, taken pairwise so no intermediate result spans most of them
+        nodes = list(nodes) or [TRUE]
+        while len(nodes) > 1:
+            nodes = [self.conjoin(*nodes[k:k + 2]) if k + 1 < len(nodes) else nodes[k] for k in range(0, len(nodes), 2)]
+        return nodes[0]
+
+    def build(self, tree):  # Compiles a parsed sentence tree into a node
+        built = {}  # id(subtree) -> node
+
+        def result(subtree):
+            return self.variable(subtree) if is_atom(subtree) else built[id(subtree)]
+
+        pending = [(tree, False)]
+        while pending:
+            subtree, expanded = pending.pop()
+            if is_atom(subtree) or id(subtree) in built:
+                continue
+            if not expanded:
+                pending.append((subtree, True))
+                pending.extend((arg, False) for arg in subtree[1:])
+                continue
+            op = subtree[0]
+            if op == '~':
+                built[id(subtree)] = self.negate(result(subtree[1]))
+                continue
+            a, b = result(subtree[1]), result(subtree[2])
+            if op == '&':
+                node = self.ite(a, b, FALSE)
+            elif op == '|':
+                node = self.ite(a, TRUE, b)
+            elif op == '=>':
+                node = self.ite(a, b, TRUE)
+            else:  # <=>
+                node = self.ite(a, b, self.negate(b))
+            built[id(subtree)] = node
+        return result(tree)
+
+    def count(self, f, num_vars):  # Number of assignments to variables 1..num_vars that satisfy f
+        counts = {FALSE: 0, TRUE: 1}
+
+        def level(node):
+            return min(self.var[node], num_vars + 1)
+
+        pending = [f]
+        while pending:
+            node = pending[-1]
+            if node in counts:
+                pending.pop()
+                continue
+            low, high = self.low[node], self.high[node]
+            missing = [child for child in (low, high) if child not in counts]
+            if missing:
+                pending.extend(missing)
+                continue
+            pending.pop()
+            counts[node] = (counts[low] << (level(low) - level(node) - 1)) + \
+                (counts[high] << (level(high) - level(node) - 1))
+        return counts[f] << (level(f) - 1)
+
+    def export(self, root):  # The nodes reachable from root as (var, low, high) rows in child-first order
+        index = {FALSE: FALSE, TRUE: TRUE}
+        rows = []
+        pending = [root]
+        while pending:
+            node = pending[-1]
+            if node in index:
+                pending.pop()
+                continue
+            missing = [child for child in (self.low[node], self.high[node]) if child not in index]
+            if missing:
+                pending.extend(missing)
+                continue
+            pending.pop()
+            index[node] = len(rows) + 2
+            rows.append((self.var[node], index[self.low[node]], index[self.high[node]]))
+        return rows, index[root]
+
+    def load_rows(self, rows):  # Rebuilds exported rows, returning the node of the last row
+        nodes = [FALSE, TRUE]
+        for var, low, high in rows:
+            nodes.append(self.node(var, nodes[low], nodes[high]))
+        return nodes[-1]
+
+
+# Function to save a compiled KB, keyed by the hex sha256 of the sentences it was compiled from
+def save(path, source_hash, symbols, bdd, root):
+    rows, exported_root = bdd.export(root)
+    names = '\n'.join(symbols.symbols()).encode()
+    ints = array('i', [value for row in rows for value in row])
+    if sys.byteorder != 'little':
+        ints.byteswap()
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, bytes.fromhex(source_hash), exported_root, len(names), len(rows)))
+        file.write(names)
+        file.write(ints.tobytes())
+
+# Function to load a compiled KB; returns (symbol names, bdd, root), or None if it is missing, stale or malformed
+def load(path, source_hash):
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+        magic, version, digest, root, names_size, num_rows = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION or digest != bytes.fromhex(source_hash):
+            return None
+        names_end = HEADER.size + names_size
+        names = data[HEADER.size:names_end].decode()
+        ints = array('i')
+        ints.frombytes(data[names_end:])
+    except (OSError, struct.error, ValueError):  # Unreadable, truncated or not UTF-8
+        return None
+    if sys.byteorder != 'little':
+        ints.byteswap()
+    symbols = names.split('\n') if names else []
+    if len(ints) != 3 * num_rows or root > num_rows + 1:
+        return None
+    rows = [tuple(ints[k:k + 3]) for k in range(0, len(ints), 3)]
+    for k, (var, low, high) in enumerate(rows):  # Every row must test a known symbol and point at earlier rows
+        if not (1 <= var <= len(symbols) and 0 <= low < k + 2 and 0 <= high < k + 2):
+            return None
+    bdd = BDD()
+    root = root if root in (FALSE, TRUE) else bdd.load_rows(rows)
+    return symbols, bdd, root
@@ -0,0 +1,71 @@
+import random
+
+# Parameterized KB generators for the benchmarks
+# Each generator returns the text of an input file in the TELL/ASK format read by engine.parse_file:
+# every sentence of the KB on the single line after TELL, and the query on the line after ASK.
+# Generators taking a seed are deterministic for a given seed, so results stay comparable across runs.
+
+PHASE_TRANSITION = 4.26  # Clause to symbol ratio where random 3-CNF is hardest
+
+
+# Function to lay out sentences and a query as an input file
+def kb_text(sentences, query):
+    return "TELL\n" + "; ".join(sentences) + ";\nASK\n" + query + "\n"
+
+# Horn chain s0 => s1 => ... => sn with s0 given, asking for the end of the chain
+def horn_chain(length):
+    sentences = [f"s{i} => s{i + 1}" for i in range(length)] + ["s0"]
+    return kb_text(sentences, f"s{length}")
+
+# Tree of rules where each node needs all of its width children, leaves are facts, asking for the root
+def fan_in_tree(depth, width):
+    sentences = []
+    level = ["n"]
+    for d in range(depth):
+        children = []
+        for node in level:
+            kids = [f"{node}_{k}" for k in range(width)]
+            sentences.append(" & ".join(kids) + f" => {node}")
+            children.extend(kids)
+        level = children
+    sentences.extend(level)  # The leaves
+    return kb_text(sentences, "n")
+
+# Ring of rules c0 => c1 => ... => c0 plus random two-premise rules across it, started from c0
+# With reachable False the start fact is left out, so every goal fails after exploring the cycles.
+def cyclic_rules(size, extra, seed=0, reachable=True):
+    rng = random.Random(seed)
+    sentences = [f"c{i} => c{(i + 1) % size}" for i in range(size)]
+    for _ in range(extra):
+        a, b, c = rng.sample(range(size), 3)
+        sentences.append(f"c{a} & c{b} => c{c}")
+    if reachable:
+        sentences.append("c0")
+    return kb_text(sentences, f"c{size // 2}")
+
+# Random 3-CNF over num_symbols symbols with ratio clauses per symbol, asking for a random literal
+def random_3cnf(num_symbols, ratio=PHASE_TRANSITION, seed=0):
+    rng = random.Random(seed)
+
+    def literal(symbol):
+        return ("~" if rng.random() < 0.5 else "") + f"x{symbol}"
+
+    sentences = []
+    for _ in range(round(num_symbols * ratio)):
+        sentences.append("(" + " | ".join(literal(s) for s in rng.sample(range(num_symbols), 3)) + ")")
+    return kb_text(sentences, literal(rng.randrange(num_symbols)))
+
+# Random sentences nested depth connectives deep, mostly => and <=>, over num_symbols symbols
+def generic_kb(num_sentences, num_symbols, depth, seed=0):
+    rng = random.Random(seed)
+
+    def sentence(d):
+        if d == 0:
+            return f"g{rng.randrange(num_symbols)}"
+        op = rng.choice(["=>", "=>", "<=>", "<=>", "&", "|", "~"])
+        if op == "~":
+            return "~" + sentence(d - 1)
+        return f"({sentence(d - 1)} {op} {sentence(rng.randrange(d))})"
+
+    sentences = [sentence(depth) for _ in range(num_sentences)]
+    return kb_text(sentences, sentence(2))
@@ -0,0 +1,192 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks import generators
+from engine import parse_file, truth_table_method
+from kbclass import PropDefiniteKB, PropKB
+from research.resolution import resolution_proof
+import stats
+import tracing
+
+# Benchmark harness: generates the suite KBs, runs each method in-process on them and records
+# wall time (best of --repeat runs), peak memory (one run under tracemalloc) and work counters
+# (one run with every trace event counted and stats collected), then compares the results with a saved baseline.
+# Usage: python3 -m benchmarks.run [--baseline FILE] [--update-baseline] [--only NAME] ...
+
+# (case name, generator, arguments, methods run on it)
+SUITE = [
+    ("horn_chain_20", generators.horn_chain, {"length": 20}, ["TT", "FC", "BC", "RES"]),
+    ("horn_chain_2000", generators.horn_chain, {"length": 2000}, ["FC", "BC", "RES"]),
+    ("fan_in_2x3", generators.fan_in_tree, {"depth": 2, "width": 3}, ["TT", "FC", "BC", "RES"]),
+    ("fan_in_4x4", generators.fan_in_tree, {"depth": 4, "width": 4}, ["FC", "BC", "RES"]),
+    ("cyclic_300", generators.cyclic_rules, {"size": 300, "extra": 300, "seed": 1}, ["FC", "BC", "RES"]),
+    ("cyclic_300_unreachable", generators.cyclic_rules, {"size": 300, "extra": 300, "seed": 1, "reachable": False},
+     ["FC", "BC", "RES"]),
+    ("3cnf_10", generators.random_3cnf, {"num_symbols": 10, "seed": 1}, ["TT", "RES"]),
+    ("3cnf_20", generators.random_3cnf, {"num_symbols": 20, "seed": 1}, ["TT"]),
+    ("generic_12", generators.generic_kb, {"num_sentences": 8, "num_symbols": 12, "depth": 4, "seed": 1},
+     ["TT", "RES"]),
+    ("generic_16", generators.generic_kb, {"num_sentences": 12, "num_symbols": 16, "depth": 5, "seed": 1}, ["TT"]),
+]
+
+# Trace event -> name of the work counter it increments, kept apart from the stats.py counter names
+EVENT_COUNTERS = {
+    tracing.RULE_FIRED: "rule_fired_events",
+    tracing.GOAL_ATTEMPTED: "goal_attempted_events",
+    tracing.GOAL_PROVEN: "goal_proven_events",
+    tracing.GOAL_FAILED: "goal_failed_events",
+    tracing.MODEL_ACCEPTED: "model_accepted_events",
+    tracing.CLAUSE_RESOLVED: "clause_resolved_events",
+}
+MIN_SECONDS = 0.01  # Time differences below this are noise, whatever the ratio
+
+
+class EventCounter:  # Tracing sink counting the events of the work counters
+    def __init__(self):
+        self.counts = {}
+
+    def __call__(self, event, fields):
+        name = EVENT_COUNTERS.get(event)
+        if name is not None:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+
+# Functions running one method on a KB, each returning (entailed, counters known from the result)
+def run_tt(sentences, query):
+    entailed, count = truth_table_method(sentences, query)
+    return entailed, {"kb_models": count}  # Models evaluated are counted by the engine stats
+
+def run_chaining(method, sentences, query):
+    kb = PropDefiniteKB()
+    kb.set_method(method)
+    for sentence in sentences:
+        kb.tell(sentence)
+    entailed = kb.forward_chain(query) if method == "FC" else kb.ask(query)
+    return entailed, {"derived": len(kb.derived_order) if entailed else 0}
+
+def run_res(sentences, query):
+    kb = PropKB()
+    for sentence in sentences:
+        kb.tell(sentence)
+    entailed, proof = resolution_proof(kb, query)
+    return entailed, {"proof_steps": len(proof)}
+
+RUNNERS = {
+    "TT": run_tt,
+    "FC": lambda sentences, query: run_chaining("FC", sentences, query),
+    "BC": lambda sentences, query: run_chaining("BC", sentences, query),
+    "RES": run_res,
+}
+
+# Function to benchmark one method on one KB
+def measure(method, sentences, query, repeat):
+    run = RUNNERS[method]
+    counter = EventCounter()
+    tracing.enable(tracing.DEBUG, counter)
+    collected = stats.collect()
+    try:
+        entailed, counters = run(sentences, query)
+    finally:
+        tracing.disable()
+        stats.stop()
+    counters.update(counter.counts)
+    counters.update(collected.counters)
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(sentences, query)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        run(sentences, query)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"answer": "YES" if entailed else "NO", "seconds": best, "peak_bytes": peak, "counters": counters}
+
+# Function to run the suite, writing the generated KBs to directory; returns {'case/method': result}
+def run_suite(directory, repeat, only=None):
+    results = {}
+    for name, generator, arguments, methods in SUITE:
+        if only and only not in name:
+            continue
+        path = os.path.join(directory, name + ".txt")
+        with open(path, "w") as file:
+            file.write(generator(**arguments))
+        sentences, query = parse_file(path)
+        for method in methods:
+            result = measure(method, sentences, query, repeat)
+            results[f"{name}/{method}"] = result
+            print(f"{name}/{method}: {result['answer']} {result['seconds'] * 1000:.1f} ms "
+                  f"{result['peak_bytes'] // 1024} KiB {result['counters']}", flush=True)
+    return results
+
+# Function to list the regressions of results against baseline results
+# Answers must match, time and peak memory may grow by at most the threshold ratio,
+# and work counters are deterministic so any growth is reported.
+def compare(results, baseline, threshold):
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result["answer"] != base["answer"]:
+            regressions.append(f"{key}: answer {base['answer']} -> {result['answer']}")
+        if result["seconds"] > base["seconds"] * threshold and result["seconds"] - base["seconds"] > MIN_SECONDS:
+            regressions.append(f"{key}: time {base['seconds'] * 1000:.1f} ms -> {result['seconds'] * 1000:.1f} ms")
+        if result["peak_bytes"] > base["peak_bytes"] * threshold:
+            regressions.append(f"{key}: peak memory {base['peak_bytes'] // 1024} KiB -> "
+                               f"{result['peak_bytes'] // 1024} KiB")
+        for counter, value in result["counters"].items():
+            if value > base["counters"].get(counter, value):
+                regressions.append(f"{key}: {counter} {base['counters'][counter]} -> {value}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the inference methods on generated KBs")
+    parser.add_argument("--output", default="benchmarks/results.json", help="where to write the results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results to --baseline instead")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="allowed time and memory ratio over the baseline (default: 1.25)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per method, the best is kept")
+    parser.add_argument("--only", metavar="NAME", help="only run the cases whose name contains NAME")
+    parser.add_argument("--kb-dir", help="keep the generated KB files in this directory")
+    args = parser.parse_args()
+
+    if args.kb_dir:
+        os.makedirs(args.kb_dir, exist_ok=True)
+        results = run_suite(args.kb_dir, args.repeat, args.only)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            results = run_suite(directory, args.repeat, args.only)
+
+    report = {"python": platform.python_version(), "results": results}
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    if not args.baseline:
+        return
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+    with open(args.baseline) as file:
+        baseline = json.load(file)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+from array import array
+
+# Compact clause storage shared by the engines
+# Clauses are kept CSR style: the literals of every clause sit back to back in one flat array('i')
+# and clause i spans literals[offsets[i]:offsets[i + 1]]. Literals are signed symbol ids from a
+# logic.SymbolTable, so a KB costs a few bytes per literal instead of a Python object per clause,
+# and the arrays can be written out or mapped back as raw bytes.
+# A store may be built over read-only buffers, e.g. int views of a memory-mapped snapshot; it is
+# copied into arrays only when a clause is added to it.
+
+
+def writable(buffer):  # The buffer itself if it can grow, else a copy of it as an array('i')
+    return buffer if isinstance(buffer, array) else array('i', buffer)
+
+
+class ClauseStore:  # CNF clauses, each a disjunction of signed symbol ids
+    def __init__(self, literals=None, offsets=None):
+        self.literals = array('i') if literals is None else literals
+        self.offsets = array('i', [0]) if offsets is None else offsets
+
+    def add(self, clause):  # Appends a clause, returning its position
+        self.literals, self.offsets = writable(self.literals), writable(self.offsets)
+        self.literals.extend(clause)
+        self.offsets.append(len(self.literals))
+        return len(self.offsets) - 2
+
+    def extend(self, clauses):
+        for clause in clauses:
+            self.add(clause)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):  # The clause at position i as a frozenset of literals
+        return frozenset(self.literals[self.offsets[i]:self.offsets[i + 1]])
+
+    def __iter__(self):
+        literals, offsets = self.literals, self.offsets
+        for i in range(len(offsets) - 1):
+            yield frozenset(literals[offsets[i]:offsets[i + 1]])
+
+
+class RuleStore:  # Definite clauses premises => head over symbol ids, with head 0 marking a retracted rule
+    def __init__(self, heads=None, premises=None, offsets=None):
+        self.heads = array('i') if heads is None else heads
+        self.premises = array('i') if premises is None else premises
+        self.offsets = array('i', [0]) if offsets is None else offsets  # Premises of rule i are premises[offsets[i]:offsets[i + 1]]
+
+    def add(self, premises, head):  # Appends a rule, returning its position
+        self.heads, self.premises, self.offsets = writable(self.heads), writable(self.premises), writable(self.offsets)
+        self.premises.extend(premises)
+        self.offsets.append(len(self.premises))
+        self.heads.append(head)
+        return len(self.heads) - 1
+
+    def remove(self, i):  # Positions of the other rules stay valid, so indexes holding them need no update
+        self.heads[i] = 0
+
+    def premises_of(self, i):
+        return self.premises[self.offsets[i]:self.offsets[i + 1]]
+
+    def size(self, i):  # Number of premises of rule i
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def __len__(self):
+        return len(self.heads)
+
+    def __getitem__(self, i):  # Rule i as (premises, head), None once retracted
+        head = self.heads[i]
+        return (self.premises_of(i), head) if head else None
+
+    def __iter__(self):
+        for i in range(len(self.heads)):
+            yield self[i]
+
+
+class SymbolIndex:  # Symbol id -> positions of the rules it appears in, as a CSR base plus the symbols changed since
+    def __init__(self, offsets=None, positions=None):
+        self.offsets = offsets  # Positions of symbol k are positions[offsets[k]:offsets[k + 1]]
+        self.positions = positions
+        self.changed = {}  # Symbol -> array('i') of its positions, once added to or removed from
+
+    def get(self, symbol, default=None):
+        found = self.changed.get(symbol)
+        if found is not None:
+            return found
+        if self.offsets is not None and symbol + 1 < len(self.offsets):
+            start, stop = self.offsets[symbol], self.offsets[symbol + 1]
+            if start < stop:
+                return self.positions[start:stop]
+        return default
+
+    def setdefault(self, symbol, default):  # The array of positions of symbol, ready to be changed
+        found = self.changed.get(symbol)
+        if found is None:
+            base = self.get(symbol)
+            found = self.changed[symbol] = default if base is None else array('i', base)
+        return found
+
+    def __getitem__(self, symbol):
+        return self.setdefault(symbol, array('i'))
+
+    def csr(self, num_symbols):  # (offsets, positions) arrays covering symbol ids 0..num_symbols
+        offsets, positions = array('i', [0]), array('i')
+        for symbol in range(num_symbols + 1):
+            positions.extend(self.get(symbol, ()))
+            offsets.append(len(positions))
+        return offsets, positions
@@ -0,0 +1,179 @@
+from logic import tseitin, tseitin_clauses
+
+# Exact model counting (#SAT) by DPLL with component decomposition and a component cache
+# Clauses are frozensets of signed symbol ids. After each branch the remaining clauses are split
+# into components that share no symbol; components are counted separately and multiplied, and
+# the count of every component is cached so a sub-KB met again on another branch is not recounted.
+# Branches are followed on an explicit stack, so a long chain of decisions never hits the recursion limit.
+
+
+SCAN_PASSES = 2  # Unit propagation rounds done by scanning the clauses before indexing them
+
+# Function to assign a literal and unit propagate; returns (clauses, assigned symbols) or None on conflict
+# The first rounds scan every clause for the literals just assigned, which is cheapest when propagation
+# stops quickly; a longer propagation goes on through an index of the clauses, so it costs one pass over
+# them rather than one per round.
+def assign(clauses, lit):
+    true = set()
+    pending = {lit}
+    for _ in range(SCAN_PASSES):
+        if not pending:
+            return clauses, {abs(lit) for lit in true}
+        if any(-lit in pending for lit in pending):
+            return None
+        true |= pending
+        negated = {-lit for lit in pending}
+        units = set()
+        reduced = []
+        for clause in clauses:
+            if not clause.isdisjoint(pending):
+                continue  # Satisfied
+            if not clause.isdisjoint(negated):
+                clause = clause - negated
+                if not clause:
+                    return None  # Every literal of the clause is false
+                if len(clause) == 1:
+                    units |= clause
+            reduced.append(clause)
+        clauses = reduced
+        pending = units
+    return propagate(clauses, pending, true)
+
+# Function to go on propagating the pending literals through an index of the clauses
+# Each clause keeps a count of its literals not yet false, so only the clauses of assigned literals are visited.
+def propagate(clauses, pending, true):
+    occurs = {}  # Literal -> positions of the clauses containing it
+    for i, clause in enumerate(clauses):
+        for lit in clause:
+            occurs.setdefault(lit, []).append(i)
+    open_literals = [len(clause) for clause in clauses]
+    satisfied = [False] * len(clauses)
+    pending = list(pending)
+    while pending:
+        lit = pending.pop()
+        if lit in true:
+            continue
+        if -lit in true:
+            return None
+        true.add(lit)
+        for i in occurs.get(lit, ()):
+            satisfied[i] = True
+        for i in occurs.get(-lit, ()):
+            if satisfied[i]:
+                continue
+            open_literals[i] -= 1
+            if not open_literals[i]:
+                return None
+            if open_literals[i] == 1:
+                pending.extend(other for other in clauses[i] if -other not in true)
+    reduced = [clause if open_literals[i] == len(clause) else frozenset(lit for lit in clause if -lit not in true)
+               for i, clause in enumerate(clauses) if not satisfied[i]]
+    return reduced, {abs(lit) for lit in true}
+
+# Function to split clauses into groups that share no symbol
+def components(clauses):
+    parent = {}
+
+    def find(var):
+        while parent[var] != var:
+            parent[var] = parent[parent[var]]
+            var = parent[var]
+        return var
+
+    for clause in clauses:
+        roots = set()
+        for lit in clause:
+            parent.setdefault(abs(lit), abs(lit))
+            roots.add(find(abs(lit)))
+        root = roots.pop()
+        for other in roots:
+            parent[other] = root
+    groups = {}
+    for clause in clauses:
+        groups.setdefault(find(abs(next(iter(clause)))), []).append(clause)
+    return list(groups.values())
+
+def variables(clauses):
+    return {abs(lit) for clause in clauses for lit in clause}
+
+class ModelCounter:
+    def __init__(self):
+        self.cache = {}  # Component (frozenset of clauses) -> number of models over its symbols
+        self.decisions = 0
+
+    # Number of assignments to the symbols of clauses that satisfy every clause
+    # Each stack frame sums the branches of one component; the branch being counted multiplies the
+    # counts of its own components into 'factor', which stays 0 once any of them has no model.
+    def count(self, clauses):
+        stack = [{'key': None, 'lits': [], 'total': 0, 'factor': 1, 'parts': components(clauses)}]
+        while True:
+            frame = stack[-1]
+            if frame['factor'] and frame['parts']:  # Count the next component of the current branch
+                component = frame['parts'].pop()
+                key = frozenset(component)
+                cached = self.cache.get(key)
+                if cached is None:
+                    stack.append(self.branch(key, component))
+                else:
+                    frame['factor'] *= cached
+                continue
+            frame['total'] += frame['factor']  # The current branch is counted
+            frame['factor'] = 0
+            if frame['lits']:  # Take the next branch
+                lit = frame['lits'].pop()
+                self.decisions += 1
+                result = assign(frame['clauses'], lit)
+                if result is not None:
+                    reduced, assigned = result
+                    free = len(frame['symbols'] - assigned - variables(reduced))  # Symbols no clause depends on any more
+                    frame['factor'] = 1 << free
+                    frame['parts'] = components(reduced)
+                continue
+            stack.pop()
+            if not stack:
+                return frame['total']
+            self.cache[frame['key']] = frame['total']
+            stack[-1]['factor'] *= frame['total']
+
+    def branch(self, key, clauses):  # A frame summing the models of a component with and without its most constrained symbol
+        occurrences = {}
+        for clause in clauses:
+            for lit in clause:
+                occurrences[abs(lit)] = occurrences.get(abs(lit), 0) + 1
+        var = max(occurrences, key=occurrences.get)
+        return {'key': key, 'clauses': clauses, 'symbols': set(occurrences), 'lits': [-var, var],
+                'total': 0, 'factor': 0, 'parts': []}
+
+# Function to count the models of clauses over their symbols and the given ones (missing from every clause, so free)
+def count_models(clauses, symbols, counter=None):
+    counter = counter or ModelCounter()
+    clauses = [frozenset(clause) for clause in clauses]
+    if any(not clause for clause in clauses):
+        return 0
+    symbols = set(symbols) | variables(clauses)
+    units = [next(iter(clause)) for clause in clauses if len(clause) == 1]
+    assigned = set()
+    for unit in units:  # Settle the unit clauses before decomposing
+        result = assign(clauses, unit)
+        if result is None:
+            return 0
+        clauses, newly = result
+        assigned |= newly
+    free = len(symbols - assigned - variables(clauses))
+    return (1 << free) * counter.count(clauses)
+
+# Model counting version of the truth table method: the same (result, count) without enumerating models
+# The Tseitin encoding keeps the count, as each auxiliary symbol is fixed by the symbols it names
+def counted_truth_table(kb_trees, query_tree, table):
+    symbols = range(1, len(table) + 1)  # Every KB and query symbol, before auxiliary symbols are added
+    encoded = {}
+    clauses = []
+    for tree in kb_trees:
+        clauses.extend(tseitin_clauses(tree, table, encoded))
+    counter = ModelCounter()
+    valid_count = count_models(clauses, symbols, counter)
+    if not valid_count:
+        return False, 0
+    goal = tseitin(query_tree, table, clauses, encoded)  # Appends the query definitions to the KB clauses
+    falsified = count_models(clauses + [[-goal]], symbols, counter)
+    return falsified == 0, valid_count
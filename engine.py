@@ -1,79 +1,383 @@
+import ast
+import multiprocessing
 import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from itertools import product
+from logic import SymbolTable, parse, is_atom, tokenize
+from counting import counted_truth_table
+import stats
+import tracing
 
 # Function to parse the input file and extract the knowledge base (KB) and query
 def parse_file(filename):
+    knowledge_base, queries = parse_file_queries(filename)
+    return knowledge_base, queries[0]
+
+# Function to parse the input file and extract the KB and every query listed after ASK
+def parse_file_queries(filename):
+    with KBReader(filename) as reader:
+        knowledge_base = list(reader.sentences())
+        return knowledge_base, reader.queries()
+
+# Characters read from the input file at a time while streaming the KB
+BLOCK_SIZE = 1 << 16
+# Separators of the TELL block: ';' ends a sentence, a newline ends a line (a sentence may span several)
+SEPARATOR_PATTERN = re.compile(r'[;\n]|[^;\n]+')
+
+
+class KBReader:  # Streams the sentences of a TELL/ASK file block by block, so the KB never has to fit in memory
+    def __init__(self, filename, block_size=BLOCK_SIZE):
+        self.file = open(filename, 'r')
+        self.block_size = block_size
+        self.rest = None  # Text read past the ASK line, set once sentences() reaches it
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.file.close()
+
+    def close(self):
+        self.file.close()
+
+    # Yields each KB sentence as soon as its ';' is read; only the sentence being read is kept
+    def sentences(self):
+        while True:
+            line = self.file.readline()
+            if not line:
+                raise ValueError("No TELL in file")
+            if line.strip() == 'TELL':
+                break
+        sentence = []  # Pieces of the sentence being read
+        line = ''  # Text of the current line while it can still be the ASK line
+        line_pieces = 0  # Pieces of the sentence that belong to the current line
+        line_open = True  # False once the current line holds a ';' or more text than ASK
+        while True:
+            block = self.file.read(self.block_size)
+            if not block:
+                raise ValueError("No ASK in file")
+            for match in SEPARATOR_PATTERN.finditer(block):
+                piece = match.group()
+                if piece == ';':
+                    text = ''.join(sentence).strip()
+                    if text:
+                        yield text
+                    sentence = []
+                    line_pieces = 0
+                    line_open = False
+                elif piece == '\n':
+                    if line_open and line.strip() == 'ASK':
+                        text = ''.join(sentence[:len(sentence) - line_pieces]).strip()  # A last sentence without ';'
+                        if text:
+                            yield text
+                        self.rest = block[match.end():]
+                        return
+                    sentence.append(' ')
+                    line = ''
+                    line_pieces = 0
+                    line_open = True
+                else:
+                    sentence.append(piece)
+                    line_pieces += 1
+                    if line_open:
+                        line += piece
+                        line_open = len(line.strip()) <= len('ASK')
+
+    # The queries after ASK, one per non-empty line; call once sentences() is exhausted
+    def queries(self):
+        if self.rest is None:
+            for sentence in self.sentences():
+                pass
+        queries = [line.strip() for line in (self.rest + self.file.read()).splitlines() if line.strip()]
+        if not queries:
+            raise ValueError("No query after ASK")
+        return queries
+
+# Function to read a query file with one query per line
+def parse_query_file(filename):
     with open(filename, 'r') as file:
-        content = file.read().splitlines()
-    tell_index = content.index('TELL')
-    ask_index = content.index('ASK')
-    knowledge_base = [line.strip() for line in content[tell_index + 1:ask_index][0].split(';') if line.strip()]
-    query = content[ask_index + 1].strip()
-    return knowledge_base, query
+        return [line.strip() for line in file if line.strip()]
 
 # Function to extract all unique symbols from the KB and query
 def extract_symbols(kb, query):
-    symbols = set()
-    pattern = re.compile(r'\b\w+\b')
-    for sentence in kb:
-        symbols.update(pattern.findall(sentence))
-    symbols.update(pattern.findall(query))
-    return list(symbols)
+    table = SymbolTable()
+    for sentence in list(kb) + [query]:
+        parse(sentence, table)
+    return table.symbols()
 
 # Function to generate all possible truth assignments for the symbols
 def generate_models(symbols):
     return [dict(zip(symbols, values)) for values in product([True, False], repeat=len(symbols))]
 
-# Function to correctly replace logical operators and symbols in a sentence
-def transform_sentence(sentence, model):
-    for symbol, value in model.items():
-        sentence = re.sub(r'\b{}\b'.format(symbol), str(value), sentence)
-    sentence = sentence.replace('~', ' not ')
-    sentence = sentence.replace('&', ' and ')
-    sentence = sentence.replace('|', ' or ')
-    sentence = re.sub(r'(\w+)\s*=>\s*([\w\s\(\)&|~]+)', r'(not \1 or \2)', sentence)
-    sentence = re.sub(r'(\w+)\s*<=>\s*([\w\s\(\)&|~]+)', r'(\1 == \2)', sentence)
-    sentence = re.sub(r'(\([\w\s\(\)&|~]+\))\s*=>\s*([\w\s\(\)&|~]+)', r'(not \1 or \2)', sentence)
-    sentence = re.sub(r'(\([\w\s\(\)&|~]+\))\s*<=>\s*([\w\s\(\)&|~]+)', r'(\1 == \2)', sentence)
-    return sentence
-
 # Function to evaluate the KB under a given model
 def evaluate_kb(kb, model):
     return all(evaluate_clause(clause, model) for clause in kb)
 
-# Helper function to evaluate a single clause under a given model
+# Helper function to evaluate a single clause under a given model, with its compiled evaluator over one-bit columns
 def evaluate_clause(clause, model):
-    try:
-        transformed_clause = transform_sentence(clause, model)
-        return eval(transformed_clause)
-    except Exception as e:
-        print(f"Error evaluating clause: {transformed_clause} with model {model}")
-        raise e
+    names, function = compiled(normalize(clause))
+    return bool(function(1, *[int(model[name]) for name in names]))
 
 # Function to evaluate the query under a given model
 def evaluate_query(query, model):
     return evaluate_clause(query, model)
 
+# Number of symbols enumerated inside one chunk, so a chunk holds 2^CHUNK_BITS models
+CHUNK_BITS = 16
+# Above this many symbols TT counts models with the #SAT counter instead of enumerating them
+MAX_ENUMERATED_SYMBOLS = 24
+# Pieces of the model space handed out per worker, so faster workers pick up more of them
+PIECES_PER_WORKER = 4
+
+# Function to build the packed-bit columns of the low symbols for one chunk
+# Bit i of column j is set when symbol j is True in model i, matching generate_models order
+def chunk_columns(width):
+    size = 1 << width
+    mask = (1 << size) - 1
+    columns = []
+    for j in range(width):
+        block = (1 << (1 << j)) - 1  # 2^j one bits followed by 2^j zero bits
+        period = 1 << (j + 1)
+        column = 0
+        for start in range(0, size, period):
+            column |= block << start
+        columns.append(column)
+    return columns, mask
+
+# Function to give the column of every symbol id for one chunk of n symbols
+# The first symbol varies slowest, as in generate_models, so symbol id k takes index bit n - k
+def symbol_columns(n, width, chunk, low_columns, mask):
+    columns = [None] * (n + 1)  # Indexed by symbol id
+    for symbol_id in range(1, n + 1):
+        bit = n - symbol_id
+        if bit < width:
+            columns[symbol_id] = low_columns[bit]
+        else:
+            columns[symbol_id] = 0 if (chunk >> (bit - width)) & 1 else mask  # Constant across the chunk
+    return columns
+
+# Function to evaluate an expression tree over every model of a chunk at once, without recursion
+# Each value is an int whose bit i holds the truth of the tree in model i. Sentences are normally
+# evaluated through their compiled Evaluator; this is the fallback for trees too deep to compile.
+def evaluate_tree(tree, columns, mask):
+    def value(node):
+        return columns[node] if is_atom(node) else values[id(node)]
+
+    values = {}  # id(subtree) -> its bits
+    pending = [(tree, False)]
+    while pending:
+        node, expanded = pending.pop()
+        if is_atom(node) or id(node) in values:
+            continue
+        if not expanded:
+            pending.append((node, True))
+            pending.extend((arg, False) for arg in node[1:])
+            continue
+        op = node[0]
+        left = value(node[1])
+        if op == '~':
+            values[id(node)] = left ^ mask
+            continue
+        right = value(node[2])
+        if op == '&':
+            values[id(node)] = left & right
+        elif op == '|':
+            values[id(node)] = left | right
+        elif op == '=>':
+            values[id(node)] = (left ^ mask) | right
+        else:  # <=>
+            values[id(node)] = (left ^ right) ^ mask
+    return value(tree)
+
+# Most distinct sentences whose compiled evaluators are kept; a KB asked again skips parsing and compiling
+COMPILED_CACHE_SIZE = 4096
+
+
+class Evaluator:  # A sentence compiled once, evaluated over the packed-bit columns of a chunk like evaluate_tree
+    __slots__ = ('function', 'symbols')
+
+    def __init__(self, function, symbols):
+        self.function = function  # function(mask, *columns of the sentence symbols, in order of appearance)
+        self.symbols = symbols  # Ids of those symbols in the caller's table
+
+    def __call__(self, columns, mask):
+        return self.function(mask, *[columns[symbol] for symbol in self.symbols])
+
+
+def normalize(sentence):  # Cache key of a sentence: its tokens, so spacing and connective aliases do not matter
+    return ' '.join(tokenize(sentence))
+
+# Function to get the evaluator of a sentence, interning its symbols in table in the same order as parse
+def evaluator(sentence, table):
+    names, function = compiled(normalize(sentence))
+    return Evaluator(function, [table.intern(name) for name in names])
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compiled(text):  # (symbol names in order of appearance, function) for a normalized sentence
+    local = SymbolTable()
+    tree = parse(text, local)
+    return tuple(local.symbols()), bit_function(tree, len(local))
+
+# Function to compile a tree into a Python function of the mask and one column per symbol id 1..n
+# The function body is built as an AST of integer bit operations, never as source text, and compiled once.
+def bit_function(tree, n):
+    arguments = ast.arguments(posonlyargs=[], args=[ast.arg('m')] + [ast.arg(f's{k}') for k in range(1, n + 1)],
+                              kwonlyargs=[], kw_defaults=[], defaults=[])
+    try:
+        function = ast.Expression(ast.Lambda(arguments, bit_expression(tree)))
+        code = compile(ast.fix_missing_locations(function), '<sentence>', 'eval')
+    except RecursionError:  # Nested too deep for the compiler, so the tree is interpreted instead
+        return lambda mask, *columns: evaluate_tree(tree, (None,) + columns, mask)
+    return eval(code, {'__builtins__': {}})
+
+def bit_expression(tree):  # AST of the bits of tree over the mask m and the symbol columns s1, s2, ...
+    def value(node):
+        return ast.Name(f's{node}', ast.Load()) if is_atom(node) else values[id(node)]
+
+    def bits(left, op, right):
+        return ast.BinOp(left, op, right)
+
+    mask = ast.Name('m', ast.Load())
+    values = {}  # id(subtree) -> its AST
+    pending = [(tree, False)]
+    while pending:
+        node, expanded = pending.pop()
+        if is_atom(node) or id(node) in values:
+            continue
+        if not expanded:
+            pending.append((node, True))
+            pending.extend((arg, False) for arg in node[1:])
+            continue
+        op = node[0]
+        left = value(node[1])
+        if op == '~':
+            values[id(node)] = bits(left, ast.BitXor(), mask)
+            continue
+        right = value(node[2])
+        if op == '&':
+            values[id(node)] = bits(left, ast.BitAnd(), right)
+        elif op == '|':
+            values[id(node)] = bits(left, ast.BitOr(), right)
+        elif op == '=>':
+            values[id(node)] = bits(bits(left, ast.BitXor(), mask), ast.BitOr(), right)
+        else:  # <=>
+            values[id(node)] = bits(bits(left, ast.BitXor(), right), ast.BitXor(), mask)
+    return value(tree)
+
+# Function to list the models whose bits are set in a chunk
+def decode_models(bits, symbols, width, chunk):
+    models = []
+    while bits:
+        low = bits & -bits
+        index = (chunk << width) | (low.bit_length() - 1)
+        models.append({sym: not (index >> (len(symbols) - 1 - k)) & 1 for k, sym in enumerate(symbols)})
+        bits ^= low
+    return models
+
+# Function to yield (chunk, columns, kb_bits) for each chunk from start to stop, where bit i of kb_bits is set when
+# model i of the chunk satisfies every KB sentence; stops early once stop_event is set
+def kb_chunks(kb_evaluators, n, width, start, stop, low_columns, mask, stop_event=None):
+    for chunk in range(start, stop):
+        if stop_event is not None and stop_event.is_set():
+            return
+        columns = symbol_columns(n, width, chunk, low_columns, mask)
+        kb_bits = mask
+        for sentence in kb_evaluators:
+            kb_bits &= sentence(columns, mask)
+            if not kb_bits:
+                break
+        yield chunk, columns, kb_bits
+
+# Function to evaluate the KB and query over chunks [start, stop) of the model space
+# Returns (number of KB models, whether the query holds in all of them). When stop_event is given
+# the scan stops as soon as a KB model falsifies the query, and also when another worker sets it.
+# Given the symbol names, every KB model is traced as a MODEL_ACCEPTED event at DEBUG level.
+# The KB and query come as Evaluators; the query is only evaluated in chunks holding a KB model.
+def evaluate_chunks(kb_evaluators, query_evaluator, n, width, start, stop, stop_event=None, symbols=None):
+    low_columns, mask = chunk_columns(width)
+    trace = tracing.tracer(tracing.DEBUG) if symbols is not None else None
+    collected = stats.current
+
+    valid_count = 0
+    query_true = True
+    chunks = 0
+    for chunk, columns, kb_bits in kb_chunks(kb_evaluators, n, width, start, stop, low_columns, mask, stop_event):
+        chunks += 1
+        if not kb_bits:
+            continue
+
+        query_bits = query_evaluator(columns, mask)
+        valid_count += kb_bits.bit_count()
+        if kb_bits & ~query_bits:
+            query_true = False  # A model of the KB falsifies the query
+            if stop_event is not None:
+                stop_event.set()
+                break
+
+        if trace is not None:
+            for model in decode_models(kb_bits, symbols, width, chunk):
+                trace(tracing.MODEL_ACCEPTED, model=model)
+    if collected is not None:
+        collected.add(models_evaluated=chunks << width, kb_models=valid_count)
+    return valid_count, query_true
+
 # Truth Table (TT) method implementation
-def truth_table_method(kb, query):
-    symbols = extract_symbols(kb, query)
-    models = generate_models(symbols)
-    
-    valid_models = []
-    for model in models:
-        if evaluate_kb(kb, model):
-            valid_models.append(model)
-            print(f"Model: {model} satisfies KB")
-    
-    query_transformed = transform_sentence(query, {sym: sym for sym in symbols})
-    
-    query_true = all(evaluate_clause(query_transformed, model) for model in valid_models) if valid_models else False
-    
-    for model in valid_models:
-        query_result = evaluate_clause(query_transformed, model)
-        print(f"Model: {model}, Query {query} is {query_result}")
-    
-    return query_true, len(valid_models)
+# Sentences are compiled once (or found in the evaluator cache) and evaluated bit-parallel over chunks of 2^CHUNK_BITS models
+def truth_table_method(kb, query, workers=1):
+    if workers > 1:
+        with stats.phase('enumerate'):  # The workers count nothing, only the time is collected
+            return parallel_truth_table_method(kb, query, workers)
+    table = SymbolTable()
+    with stats.phase('parse'):
+        kb_evaluators = [evaluator(sentence, table) for sentence in kb]
+        query_evaluator = evaluator(query, table)
+    symbols = table.symbols()
+
+    n = len(symbols)
+    if n > MAX_ENUMERATED_SYMBOLS:  # Same symbol ids, as the evaluators interned them in parse order
+        with stats.phase('count'):
+            return counted_truth_table([parse(sentence, table) for sentence in kb], parse(query, table), table)
+    width = min(n, CHUNK_BITS)
+    with stats.phase('enumerate'):
+        valid_count, query_true = evaluate_chunks(kb_evaluators, query_evaluator, n, width, 0, 1 << (n - width),
+                                                  symbols=symbols)
+    return (query_true if valid_count else False), valid_count
+
+# Function run by each worker of the parallel TT method on its share of the chunks
+def truth_table_worker(kb, query, width, start, stop, stop_event):
+    table = SymbolTable()
+    kb_evaluators = [evaluator(sentence, table) for sentence in kb]
+    query_evaluator = evaluator(query, table)
+    return evaluate_chunks(kb_evaluators, query_evaluator, len(table), width, start, stop, stop_event)
+
+# Parallel TT: the model space is split by fixing the top symbols and the pieces run in a process pool
+# Every worker stops once any of them finds a KB model where the query is false, so the count
+# is only complete when the query is entailed, which is the only case where it is reported.
+def parallel_truth_table_method(kb, query, workers):
+    n = len(extract_symbols(kb, query))
+    pieces = workers * PIECES_PER_WORKER
+    fixed = min(n, (pieces - 1).bit_length())  # Top symbols fixed per piece
+    width = min(CHUNK_BITS, n - fixed)
+    total = 1 << (n - width)
+    bounds = [total * i // pieces for i in range(pieces + 1)]
+
+    valid_count = 0
+    query_true = True
+    with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=workers) as pool:
+        stop_event = manager.Event()
+        futures = [pool.submit(truth_table_worker, kb, query, width, start, stop, stop_event)
+                   for start, stop in zip(bounds, bounds[1:]) if start < stop]
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            count, piece_true = future.result()
+            valid_count += count
+            if not piece_true:
+                query_true = False
+                for pending in futures:
+                    pending.cancel()  # Pieces not started yet are dropped
+    return (query_true if valid_count else False), valid_count
 
 if __name__ == "__main__":
     import sys
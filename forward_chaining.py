@@ -1,25 +1,52 @@
-def forward_chain(self, query=None):  # Apply forward chaining to infer all possible facts
-        added = True
-        self.derived_order.extend(sorted(self.initial_facts)) # Checks that initial facts are added to the derived order list
-        while added:
-            added = False  # Reset flag to false
-            to_infer = []  # Tracks the new inferred facts in this loop
-            print(f"Current inferred facts: {self.inferred}")
-            for premises, conclusion in self.clauses:
-                if premises.issubset(self.inferred):  # Checks if all premises are already inferred
-                    if conclusion not in self.inferred:  # Checks if conclusion is not already inferred
-                        to_infer.append(conclusion)  # Tracks the order of each derivation
-                        added = True  # Sets the flag to True to show new fact was inferred
-                        print(f"Derived new fact: {conclusion}")  # Debug Statements here;
-                    else:
-                        print(f"Already Derived: {conclusion}")  # Debug Output
-                else:
-                    print(f"Failed to derive new fact from premises: {premises} for conclusion: {conclusion}")
-            for fact in to_infer:  # Adds all new facts to inferred and derived order
-                self.inferred.add(fact) 
-                if fact not in self.derived_order:
-                    self.derived_order.append(fact)
-            to_infer.clear() # Clear the list
-        if query and query in self.derived_order:
-            self.derived_order.remove(query)
-            self.derived_order.append(query)
\ No newline at end of file
+import stats
+import tracing
+
+def forward_chain(self, query=None):  # Apply forward chaining to infer all possible facts, or stop once query is inferred
+    goals = [query] if isinstance(query, int) else list(query or [])  # A conjunctive query is a list of symbol ids
+    remaining = set(goals) - self.inferred
+    self.derived_order.extend(sorted(self.initial_facts, key=self.symbols.name)) # Checks that initial facts are added to the derived order list
+    ordered = set(self.derived_order)  # Membership of derived_order without scanning the list
+    trace = tracing.tracer(tracing.INFO)
+    collected = stats.current
+    scanned = fired_rules = 0
+
+    heads, offsets = self.clauses.heads, self.clauses.offsets
+    count = [offsets[i + 1] - offsets[i] for i in range(len(heads))]  # Unsatisfied premises left per rule
+    rules_for = self.premise_index  # Index of symbol -> rules that have it as a premise, kept by tell
+
+    # The agenda is processed a generation at a time: rules satisfied by one generation fire
+    # together in clause order, giving the same derivation order as rescanning every clause per pass
+    agenda = sorted(self.inferred) if remaining or not goals else []
+    while agenda:
+        fired = []
+        for symbol in agenda:
+            rules = rules_for.get(symbol, ())
+            scanned += len(rules)
+            for i in rules:
+                count[i] -= 1
+                if count[i] == 0:  # Every premise of the rule is now inferred
+                    fired.append(i)
+        agenda = []
+        for i in sorted(fired):
+            conclusion = heads[i]
+            if conclusion in self.inferred:  # Checks if conclusion is not already inferred
+                continue
+            self.inferred.add(conclusion)
+            agenda.append(conclusion)
+            fired_rules += 1
+            if trace is not None:
+                trace(tracing.RULE_FIRED, symbol=self.symbols.name(conclusion),
+                      premises=self.names(self.clauses.premises_of(i)))
+            if conclusion not in ordered:
+                ordered.add(conclusion)
+                self.derived_order.append(conclusion)
+            remaining.discard(conclusion)
+            if goals and not remaining:  # Stop as soon as the query is derived
+                agenda = []
+                break
+    if collected is not None:
+        collected.add(clauses_scanned=scanned, rules_fired=fired_rules)
+    for goal in goals:  # Moves the query to the end of the derived order
+        if goal in self.derived_order:
+            self.derived_order.remove(goal)
+            self.derived_order.append(goal)
\ No newline at end of file
@@ -1,5 +1,13 @@
+from array import array
 from forward_chaining import forward_chain
 from backward_chaining import backward_chain
+from logic import SymbolTable, parse, is_atom, atoms, to_clauses, definite_clauses, tseitin, tseitin_clauses
+from sat import Solver
+from clausestore import ClauseStore, RuleStore, SymbolIndex
+import bdd
+import hashlib
+import stats
+import tracing
 
 
 class KB:  # Base Class for KB
@@ -18,14 +26,126 @@ class KB:  # Base Class for KB
         # Removes a sentence from KB
         raise NotImplementedError("This method should be overridden by subclasses")
     
+class PropKB(KB):  # Subclass of KB which stores any propositional sentence as CNF clauses
+
+    def __init__(self):
+        super().__init__()
+        self.clauses = ClauseStore()  # CNF clauses of signed symbol ids in flat arrays
+        self.symbols = SymbolTable()  # Interned symbols of every told sentence
+
+    def tell(self, sentence):  # Adds the clauses of the sentence, each read back as a frozenset of signed symbol ids
+        with stats.phase('parse'):
+            tree = parse(sentence, self.symbols)
+        with stats.phase('cnf'):
+            self.clauses.extend(to_clauses(tree, self.symbols))
+
+class SATKB(KB):  # Subclass of KB which decides entailment with the CDCL solver
+
+    def __init__(self):
+        super().__init__()
+        self.clauses = ClauseStore()  # Encoded clauses, as told to the solver
+        self.symbols = SymbolTable()  # Interned symbols, plus the auxiliary symbols of the encoding
+        self.solver = Solver()
+        self.encoded = {}  # Tseitin literals of the subformulas encoded so far
+
+    def tell(self, sentence):  # Adds the Tseitin clauses of the sentence to the solver
+        with stats.phase('parse'):
+            tree = parse(sentence, self.symbols)
+        with stats.phase('cnf'):
+            for clause in tseitin_clauses(tree, self.symbols, self.encoded):
+                self.clauses.add(clause)
+                self.solver.add_clause(clause)
+
+    def ask(self, query):  # The KB entails query when KB & ~query is unsatisfiable
+        conflicts = self.solver.conflicts
+        with stats.phase('solve'):
+            entailed = self.entails(query)
+        if stats.current is not None:
+            stats.current.add(conflicts=self.solver.conflicts - conflicts)
+        return entailed
+
+    def entails(self, query):
+        if not self.solver.solve():
+            return False  # A KB without models answers NO, as in TT
+        definitions = []
+        goal = tseitin(parse(query, self.symbols), self.symbols, definitions, self.encoded)
+        for clause in definitions:  # Definitions only name subformulas, so they can stay for later queries
+            self.solver.add_clause(clause)
+        return not self.solver.solve([-goal])
+
+class BDDKB(KB):  # Subclass of KB compiled into one BDD, answering many queries without re-enumerating models
+
+    def __init__(self):
+        super().__init__()
+        self.symbols = SymbolTable()
+        self.bdd = bdd.BDD()
+        self.root = bdd.TRUE  # Conjunction of every told sentence
+        self.kb_symbols = set()  # Ids of the symbols in told sentences
+
+    def tell(self, sentence):
+        self.root = self.bdd.conjoin(self.root, self.build(sentence))
+
+    def build(self, sentence):  # Records the sentence and returns its node, without adding it to the KB root
+        self.clauses.append(sentence)
+        with stats.phase('parse'):
+            tree = parse(sentence, self.symbols)
+        self.kb_symbols |= atoms(tree)
+        with stats.phase('compile'):
+            return self.bdd.build(tree)
+
+    def ask(self, query):  # Entailed when KB & ~query is the FALSE node; a KB without models answers NO
+        negated = self.bdd.negate(self.bdd.build(parse(query, self.symbols)))
+        return self.root != bdd.FALSE and self.bdd.conjoin(self.root, negated) == bdd.FALSE
+
+    def count(self, query=None):  # Number of models of the KB over its symbols and those of query, as in TT
+        counted = set(self.kb_symbols)
+        if query is not None:
+            counted |= atoms(parse(query, self.symbols))
+        total = len(self.symbols)
+        return self.bdd.count(self.root, total) >> (total - len(counted))  # Drop symbols of other queries
+
+    def save(self, path):
+        bdd.save(path, self.source_hash(self.clauses), self.symbols, self.bdd, self.root)
+
+    @staticmethod
+    def source_hash(sentences):
+        return hashlib.sha256('\n'.join(sentences).encode()).hexdigest()
+
+    @classmethod
+    def compile(cls, sentences, path=None):  # Loads the KB compiled at path if it matches sentences, else compiles and saves it
+        kb = cls()
+        loaded = bdd.load(path, cls.source_hash(sentences)) if path else None
+        if loaded:
+            names, kb.bdd, kb.root = loaded
+            for name in names:
+                kb.symbols.intern(name)  # Same ids as when the KB was compiled
+            kb.kb_symbols = set(range(1, len(names) + 1))
+            kb.clauses = list(sentences)
+            return kb
+        nodes = [kb.build(sentence) for sentence in sentences]
+        with stats.phase('compile'):
+            kb.root = kb.bdd.conjoin_all(nodes)
+        if path:
+            try:
+                kb.save(path)
+            except OSError:  # The cache is optional: a KB that cannot be saved still answers
+                pass
+        return kb
+
 class PropDefiniteKB(KB):  # Subclass of KB which will handle propositional definite kb
         
     def __init__(self):
         super().__init__()  # Call the initializer of the base class
+        self.clauses = RuleStore()  # Rules as symbol ids in flat arrays
         self.inferred = set()  # Initialize the inferred facts set as an instance variable
         self.method = None  # Specifies the chaining method
         self.derived_order = []  # List the order of the derivations
         self.initial_facts = set() # Set to track initial facts
+        self.fact_counts = {}  # Fact -> number of times it was told, so retracting one copy keeps the others
+        self.symbols = SymbolTable()  # Interned symbols of every told sentence; inferred, facts and order hold their ids
+        self.conclusion_index = SymbolIndex()  # Index of conclusion -> positions in clauses of the rules concluding it
+        self.premise_index = SymbolIndex()  # Index of premise -> positions in clauses of the rules using it
+        self.saturated = False  # True while inferred holds the whole closure, kept up to date by tell and retract
 
     def set_method(self, method):
         if method in ["BC", "FC"]:
@@ -37,26 +157,140 @@ class PropDefiniteKB(KB):  # Subclass of KB which will handle propositional defi
         if self.method == "BC":
             return self.backward_chain(query)
         elif self.method == "FC":
-            return query in self.inferred  # Check the already inferred facts
+            atoms = self.query_atoms(query)
+            return atoms is not None and all(atom in self.inferred for atom in atoms)  # Check the already inferred facts
         else:
             raise ValueError("Unsupported method specified")
 
+    def names(self, symbol_ids):  # Symbol names of ids, e.g. of derived_order for printing
+        return [self.symbols.name(symbol_id) for symbol_id in symbol_ids]
+
+    def query_atoms(self, query):  # Splits a conjunctive query into its symbol ids, None if it is not a conjunction of symbols
+        atoms = []
+        pending = [parse(query, self.symbols)]
+        while pending:
+            tree = pending.pop()
+            if is_atom(tree):
+                atoms.append(tree)
+            elif tree[0] == '&':
+                pending.extend(reversed(tree[1:]))  # Keep the conjuncts in sentence order
+            else:
+                return None
+        return atoms
+
     def tell(self, sentence):  # Parses and stores rules and facts from the sentence
-        if '=>' in sentence:
-            premise, conclusion = sentence.split('=>')  # Splits sentence into premise and conclusion at =>
-            premises = set(prem.strip() for prem in premise.split('&'))  # Creates set of premises split at &
-            self.clauses.append((premises, conclusion.strip()))  # Add rule to the kb
-        else:
-            fact = sentence.strip()
-            self.inferred.add(fact)  # Directly adds facts to inferred
-            self.initial_facts.add(fact) # Track initial facts given
-            print(f"Fact added to inferred: {fact}")
-            
+        trace = tracing.tracer(tracing.INFO)
+        with stats.phase('parse'):
+            tree = parse(sentence, self.symbols)
+        for premises, conclusion in definite_clauses(tree):  # Non-Horn clauses are ignored
+            if premises:
+                i = self.clauses.add(sorted(premises), conclusion)  # Add rule to the kb, premises in symbol order
+                self.conclusion_index.setdefault(conclusion, array('i')).append(i)
+                for prem in premises:
+                    self.premise_index.setdefault(prem, array('i')).append(i)
+                if self.saturated and conclusion not in self.inferred and premises <= self.inferred:
+                    self.derive(conclusion)  # The new rule fires straight away
+            else:
+                if self.saturated and conclusion not in self.inferred:
+                    self.derive(conclusion)
+                self.inferred.add(conclusion)  # Directly adds facts to inferred
+                self.initial_facts.add(conclusion) # Track initial facts given
+                self.fact_counts[conclusion] = self.fact_counts.get(conclusion, 0) + 1
+                if trace is not None:
+                    trace(tracing.FACT_ADDED, symbol=self.symbols.name(conclusion))
+
+    def retract(self, sentence):  # Removes the rules and facts of the sentence and every conclusion left unsupported
+        removed = []  # Symbols whose support may have been lost
+        for premises, conclusion in definite_clauses(parse(sentence, self.symbols)):
+            if not premises:
+                if conclusion in self.initial_facts:
+                    self.fact_counts[conclusion] -= 1
+                    if not self.fact_counts[conclusion]:
+                        del self.fact_counts[conclusion]
+                        self.initial_facts.discard(conclusion)
+                        removed.append(conclusion)
+                continue
+            for i in self.conclusion_index.get(conclusion, ()):
+                if self.clauses.size(i) == len(premises) and premises.issuperset(self.clauses.premises_of(i)):
+                    self.clauses.remove(i)  # Retracts one copy of the rule
+                    self.conclusion_index[conclusion].remove(i)
+                    for prem in premises:
+                        self.premise_index[prem].remove(i)
+                    removed.append(conclusion)
+                    break
+        self.rederive(self.overdelete(removed))
+
+    def fires(self, i):  # True if every premise of rule i is inferred
+        inferred = self.inferred
+        return all(prem in inferred for prem in self.clauses.premises_of(i))
+
+    def derive(self, symbol):  # Adds a newly derived symbol and propagates only its new consequences
+        heads = self.clauses.heads
+        pending = [symbol]
+        while pending:
+            symbol = pending.pop()
+            if symbol in self.inferred:
+                continue
+            self.inferred.add(symbol)
+            for i in self.premise_index.get(symbol, ()):
+                if heads[i] not in self.inferred and self.fires(i):
+                    pending.append(heads[i])
+
+    # Delete and rederive (DRed): first remove every inferred symbol reachable from the removed support,
+    # then put back those that still have a derivation from what is left. Both passes only visit the
+    # symbols downstream of the change, so the update cost follows the change rather than the KB.
+    # Only the closure is kept up to date; derived_order stays as the last chaining run left it until
+    # closure_order rebuilds it.
+    def overdelete(self, removed):
+        heads = self.clauses.heads
+        deleted = set()
+        pending = [symbol for symbol in removed if symbol in self.inferred]
+        while pending:
+            symbol = pending.pop()
+            if symbol in deleted:
+                continue
+            deleted.add(symbol)
+            for i in self.premise_index.get(symbol, ()):
+                if heads[i] in self.inferred and heads[i] not in deleted:
+                    pending.append(heads[i])
+        self.inferred -= deleted
+        return deleted
+
+    def supported(self, symbol):  # True if symbol is a fact or some rule concluding it has every premise inferred
+        return symbol in self.initial_facts or any(self.fires(i) for i in self.conclusion_index.get(symbol, ()))
+
+    def rederive(self, deleted):
+        heads = self.clauses.heads
+        pending = [symbol for symbol in deleted if self.supported(symbol)]
+        while pending:
+            symbol = pending.pop()
+            if symbol in self.inferred:
+                continue
+            self.inferred.add(symbol)
+            for i in self.premise_index.get(symbol, ()):
+                if heads[i] in deleted and heads[i] not in self.inferred and self.fires(i):
+                    pending.append(heads[i])
+
+    def saturate(self):  # Infers the whole closure once, then tell and retract keep it up to date
+        with stats.phase('forward_chain'):
+            forward_chain(self)
+        self.saturated = True
+
+    def closure_order(self):  # Rebuilds derived_order as a fresh forward chaining run over the current KB orders it
+        self.inferred = set(self.initial_facts)
+        self.derived_order = []
+        with stats.phase('forward_chain'):
+            forward_chain(self)  # Ends with the same closure tell and retract kept up to date
+        return self.derived_order
+
     def forward_chain(self, query):
-        forward_chain(self)
-        return query in self.inferred
+        atoms = self.query_atoms(query)
+        if not self.saturated:
+            with stats.phase('forward_chain'):
+                forward_chain(self, atoms)  # Stops early once every query symbol is inferred
+        return atoms is not None and all(atom in self.inferred for atom in atoms)
     
     def backward_chain(self, query):
-        return backward_chain(self, query)
- 
-
+        atoms = self.query_atoms(query)
+        with stats.phase('backward_chain'):
+            return atoms is not None and all(backward_chain(self, atom) for atom in atoms)
@@ -0,0 +1,407 @@
+import re
+from itertools import product
+
+# Shared sentence parser used by every inference method
+# A sentence is parsed once into an immutable tree of nested tuples:
+#   an int is a symbol id, ('~', a) is a negation and (op, a, b) is a binary connective
+#   with op one of '&', '|', '=>', '<=>'
+
+TOKEN_PATTERN = re.compile(r'\s*(<=>|=>|\|\||&&|[~&|()]|\w+)')
+SYMBOL_PATTERN = re.compile(r'\w+')
+PRECEDENCE = {'<=>': 1, '=>': 2, '|': 3, '&': 4, '~': 5}  # Binding strength of each connective
+
+
+class SymbolTable:  # Interns symbol names to small ints starting at 1, so -id can stand for ~symbol
+    def __init__(self):
+        self.names = [None]  # Index 0 is unused so every id is non-zero
+        self.ids = {}
+
+    def intern(self, name):
+        symbol_id = self.ids.get(name)
+        if symbol_id is None:
+            symbol_id = len(self.names)
+            self.ids[name] = symbol_id
+            self.names.append(name)
+        return symbol_id
+
+    def fresh(self):  # Interns a new auxiliary symbol whose name can never be parsed from a sentence
+        return self.intern(f'#{len(self.names)}')
+
+    def name(self, symbol_id):
+        return self.names[symbol_id]
+
+    def symbols(self):
+        return self.names[1:]  # All interned names in id order
+
+    def __len__(self):
+        return len(self.names) - 1
+
+    def __contains__(self, name):
+        return name in self.ids
+
+
+# Function to split a sentence into operator and symbol tokens
+def tokenize(sentence):
+    tokens = []
+    pos = 0
+    sentence = sentence.strip()
+    while pos < len(sentence):
+        match = TOKEN_PATTERN.match(sentence, pos)
+        if not match:
+            raise SyntaxError(f"Unexpected character {sentence[pos]!r} in sentence: {sentence}")
+        token = match.group(1)
+        tokens.append({'||': '|', '&&': '&'}.get(token, token))  # Accept doubled connectives as aliases
+        pos = match.end()
+        while pos < len(sentence) and sentence[pos].isspace():
+            pos += 1
+    return tokens
+
+# Function to parse a sentence into a tree, interning its symbols into the table
+# Precedence from loosest to tightest: <=>, =>, |, &, ~
+# Operators wait on an explicit stack until a looser one (or the end) reduces them, so nesting depth
+# is bounded by memory rather than the recursion limit.
+def parse(sentence, symbols):
+    operands = []
+    operators = []  # '(', '~' and binary connectives not yet applied
+
+    def reduce():
+        op = operators.pop()
+        if op == '~':
+            operands.append(('~', operands.pop()))
+        else:
+            right = operands.pop()
+            operands.append((op, operands.pop(), right))
+
+    expect_operand = True
+    for token in tokenize(sentence):
+        if expect_operand:
+            if token in ('~', '('):
+                operators.append(token)
+                continue
+            if not SYMBOL_PATTERN.fullmatch(token):
+                raise SyntaxError(f"Unexpected token {token!r} in sentence: {sentence}")
+            operands.append(symbols.intern(token))
+            expect_operand = False
+        elif token == ')':
+            while operators and operators[-1] != '(':
+                reduce()
+            if not operators:
+                raise SyntaxError(f"Unexpected token ')' in sentence: {sentence}")
+            operators.pop()
+        elif token in PRECEDENCE and token != '~':
+            precedence = PRECEDENCE[token]
+            while operators and operators[-1] != '(' and (
+                    PRECEDENCE[operators[-1]] > precedence
+                    or (PRECEDENCE[operators[-1]] == precedence and token != '=>')):  # Implication is right associative
+                reduce()
+            operators.append(token)
+            expect_operand = True
+        elif '(' in operators:
+            raise SyntaxError(f"Expected ) in sentence: {sentence}")
+        else:
+            raise SyntaxError(f"Unexpected token {token!r} in sentence: {sentence}")
+    if expect_operand:
+        raise SyntaxError(f"Expected a symbol in sentence: {sentence}")
+    while operators:
+        if operators[-1] == '(':
+            raise SyntaxError(f"Expected ) in sentence: {sentence}")
+        reduce()
+    return operands[0]
+
+# Function to check whether a tree is a single symbol
+def is_atom(tree):
+    return isinstance(tree, int)
+
+# Function to collect the symbol ids appearing in a tree
+def atoms(tree, found=None):
+    if found is None:
+        found = set()
+    pending = [tree]
+    while pending:
+        node = pending.pop()
+        if is_atom(node):
+            found.add(node)
+        else:
+            pending.extend(node[1:])
+    return found
+
+# Function to render a tree back into sentence text
+def to_text(tree, symbols):
+    if is_atom(tree):
+        return symbols.name(tree)
+    if tree[0] == '~':
+        return '~' + to_text(tree[1], symbols)
+    return '(' + to_text(tree[1], symbols) + f' {tree[0]} ' + to_text(tree[2], symbols) + ')'
+
+# Function to evaluate a tree under a model mapping symbol ids to booleans
+def evaluate(tree, model):
+    if is_atom(tree):
+        return model[tree]
+    op = tree[0]
+    if op == '~':
+        return not evaluate(tree[1], model)
+    left = evaluate(tree[1], model)
+    if op == '&':
+        return left and evaluate(tree[2], model)
+    if op == '|':
+        return left or evaluate(tree[2], model)
+    if op == '=>':
+        return not left or evaluate(tree[2], model)
+    return left == evaluate(tree[2], model)  # <=>
+
+# Above this many clauses from distributing one connective, to_clauses names an operand with a fresh symbol
+MAX_DISTRIBUTED_CLAUSES = 64
+
+# Function to share equal subtrees, so each distinct subformula is a single object
+def hash_cons(tree, table=None):
+    table = {} if table is None else table  # (op, ids of the shared children) -> shared node
+    shared = {}  # id(node) -> its shared node
+    pending = [(tree, False)]
+    while pending:
+        node, expanded = pending.pop()
+        if is_atom(node) or id(node) in shared:
+            continue
+        if not expanded:
+            pending.append((node, True))
+            pending.extend((arg, False) for arg in node[1:])
+            continue
+        args = tuple(arg if is_atom(arg) else shared[id(arg)] for arg in node[1:])
+        key = (node[0],) + tuple(arg if is_atom(arg) else id(arg) for arg in args)
+        shared[id(node)] = table.setdefault(key, (node[0],) + args)
+    return tree if is_atom(tree) else shared[id(tree)]
+
+# Function to convert a tree to CNF as a list of clauses
+# Each clause is a frozenset of signed symbol ids, where -id is the negated symbol.
+# Subformulas are hash-consed and converted once per polarity, bottom up without recursion. Given a
+# symbol table, a connective whose distribution would exceed MAX_DISTRIBUTED_CLAUSES names its larger
+# operand with a fresh symbol x, adding Tseitin definitions x => operand (x <=> operand under <=>) to
+# the clauses. The clause count then stays linear in the input, and the models of the result are
+# exactly the models of the tree once the fresh symbols are forgotten.
+def to_clauses(tree, symbols=None):
+    definitions = []
+    converted = _cnf(hash_cons(tree), symbols, definitions)
+    clauses = []
+    seen = set()
+    for clause in converted + definitions:
+        if clause not in seen and not _tautology(clause):  # Drop duplicates and tautologies
+            seen.add(clause)
+            clauses.append(clause)
+    return clauses
+
+def _tautology(clause):
+    return any(-lit in clause for lit in clause)
+
+# Literal polarity of the operands and how their clauses combine, per connective and polarity of the node
+# a <=> b is (~a | b) & (a | ~b), and ~(a <=> b) is (a | b) & (~a | ~b)
+_CNF_RULES = {
+    ('&', True): ('and', True, True), ('&', False): ('or', False, False),
+    ('|', True): ('or', True, True), ('|', False): ('and', False, False),
+    ('=>', True): ('or', False, True), ('=>', False): ('and', True, False),
+}
+
+def _operands(node, positive):  # The (subtree, polarity) pairs the clauses of node are built from
+    if node[0] == '~':
+        return [(node[1], not positive)]
+    a, b = node[1], node[2]
+    if node[0] == '<=>':
+        return [(a, True), (a, False), (b, True), (b, False)]
+    _, pa, pb = _CNF_RULES[node[0], positive]
+    return [(a, pa), (b, pb)]
+
+def _uses(tree):  # (id(shared subtree), polarity) -> number of nodes built from its clauses
+    uses = {(id(tree), True): 1}  # The root is kept for the caller
+    pending = [(tree, True)]
+    while pending:
+        node, positive = pending.pop()
+        for arg, polarity in _operands(node, positive):
+            if is_atom(arg):
+                continue
+            key = (id(arg), polarity)
+            if key not in uses:
+                uses[key] = 0
+                pending.append((arg, polarity))
+            uses[key] += 1
+    return uses
+
+def _cnf(tree, symbols, definitions):
+    if is_atom(tree):
+        return [frozenset([tree])]
+    uses = _uses(tree)
+    memo = {}  # (id(shared subtree), polarity) -> its clauses, dropped once its last user is built
+    named = {}  # id(clause list) -> (fresh symbol standing for it, the list, kept so the id stays its own)
+
+    def clauses_of(node, positive):
+        return [frozenset([node if positive else -node])] if is_atom(node) else memo[id(node), positive]
+
+    def disjoin(left, right):
+        if symbols is not None and min(len(left), len(right)) > 1 and len(left) * len(right) > MAX_DISTRIBUTED_CLAUSES:
+            if len(left) >= len(right):
+                left = name(left)
+            else:
+                right = name(right)
+        return _disjoin(left, right)
+
+    def name(clauses):
+        x = named.get(id(clauses), (None,))[0]
+        if x is None:
+            x = symbols.fresh()
+            named[id(clauses)] = (x, clauses)
+            definitions.extend(clause | {-x} for clause in clauses)  # x => clauses
+        return [frozenset([x])]
+
+    def name_both(positive, negative):  # Names a subtree used at both polarities: x <=> subtree
+        key = (id(positive), id(negative))
+        x = named.get(key, (None,))[0]
+        if x is None:
+            x = symbols.fresh()
+            named[key] = (x, positive, negative)
+            definitions.extend(clause | {-x} for clause in positive)
+            definitions.extend(clause | {x} for clause in negative)
+        return [frozenset([x])], [frozenset([-x])]
+
+    def equivalence(a_pos, a_neg, b_pos, b_neg, positive):
+        # Each side is distributed twice, once per polarity, so name the larger side while that is too much
+        while symbols is not None:
+            size = len(a_neg) * len(b_pos) + len(a_pos) * len(b_neg)
+            if size <= MAX_DISTRIBUTED_CLAUSES:
+                break
+            if len(a_pos) + len(a_neg) >= len(b_pos) + len(b_neg):
+                if len(a_pos) + len(a_neg) == 2:
+                    break
+                a_pos, a_neg = name_both(a_pos, a_neg)
+            else:
+                b_pos, b_neg = name_both(b_pos, b_neg)
+        if positive:
+            return _conjoin(disjoin(a_neg, b_pos), disjoin(a_pos, b_neg))
+        return _conjoin(disjoin(a_pos, b_pos), disjoin(a_neg, b_neg))
+
+    pending = [(tree, True, False)]
+    while pending:
+        node, positive, expanded = pending.pop()
+        if is_atom(node) or (id(node), positive) in memo:
+            continue
+        operands = _operands(node, positive)
+        if not expanded:
+            pending.append((node, positive, True))
+            pending.extend((arg, polarity, False) for arg, polarity in reversed(operands))
+            continue
+        args = [clauses_of(arg, polarity) for arg, polarity in operands]
+        if node[0] == '~':
+            clauses = args[0]
+        elif node[0] == '<=>':
+            clauses = equivalence(*args, positive)
+        elif _CNF_RULES[node[0], positive][0] == 'and':
+            clauses = _conjoin(*args)
+        else:
+            clauses = disjoin(*args)
+        memo[id(node), positive] = clauses
+        for arg, polarity in operands:  # Free the operands no other node is waiting for
+            if not is_atom(arg):
+                key = (id(arg), polarity)
+                uses[key] -= 1
+                if not uses[key]:
+                    del memo[key]
+    return memo[id(tree), True]
+
+def _conjoin(left, right):
+    return left + right
+
+def _disjoin(left, right):  # Distribute OR over AND, dropping duplicate and tautological clauses as they appear
+    return list(dict.fromkeys(l | r for l, r in product(left, right) if not _complementary(l, r)))
+
+def _complementary(left, right):  # Whether the clauses share a literal with opposite signs
+    if len(left) > len(right):
+        left, right = right, left
+    return any(-lit in right for lit in left)
+
+# Function to split a clause into Horn form: (premises, conclusion)
+# Returns None for clauses that are not definite (zero or several positive literals)
+def definite_clause(clause):
+    positive = [lit for lit in clause if lit > 0]
+    if len(positive) != 1:
+        return None
+    return frozenset(-lit for lit in clause if lit < 0), positive[0]
+
+# Function to extract the definite clauses of a tree; facts have empty premises
+def definite_clauses(tree):
+    return [horn for horn in map(definite_clause, to_clauses(tree)) if horn is not None]
+
+# Function to render a clause of signed symbol ids as a disjunction
+def clause_text(clause, symbols):
+    if not clause:
+        return '{}'  # The empty clause
+    return ' | '.join(('~' if lit < 0 else '') + symbols.name(abs(lit)) for lit in sorted(clause, key=abs))
+
+# Function to list the top-level conjuncts of a tree
+def conjuncts(tree):
+    found = []
+    pending = [tree]
+    while pending:
+        node = pending.pop()
+        if not is_atom(node) and node[0] == '&':
+            pending.extend((node[2], node[1]))  # Keep the conjuncts in sentence order
+        else:
+            found.append(node)
+    return found
+
+# Function to read a tree as a single clause, or None if it is not a disjunction of literals
+def as_clause(tree):
+    clause = set()
+    pending = [tree]
+    while pending:
+        node = pending.pop()
+        if is_atom(node):
+            clause.add(node)
+        elif node[0] == '~' and is_atom(node[1]):
+            clause.add(-node[1])
+        elif node[0] == '|':
+            pending.extend(node[1:])
+        else:
+            return None
+    return clause
+
+# Function to give a literal equivalent to a tree, adding Tseitin definitions to clauses
+# Each connective gets one fresh auxiliary symbol defined by equivalence clauses, so the encoding is
+# linear in the size of the tree and every model of the tree extends to exactly one model of the clauses.
+# cache maps id(node) -> (node, literal) so shared subtrees are encoded once.
+def tseitin(tree, symbols, clauses, cache):
+    def literal(node):
+        return node if is_atom(node) else cache[id(node)][1]
+
+    pending = [(tree, False)]
+    while pending:
+        node, expanded = pending.pop()
+        if is_atom(node) or id(node) in cache:
+            continue
+        if not expanded:
+            pending.append((node, True))
+            pending.extend((arg, False) for arg in node[1:])
+            continue
+        if node[0] == '~':
+            cache[id(node)] = (node, -literal(node[1]))
+            continue
+        a, b = literal(node[1]), literal(node[2])
+        x = symbols.fresh()
+        op = node[0]
+        if op == '&':  # x <=> a & b
+            clauses.extend(([-x, a], [-x, b], [x, -a, -b]))
+        elif op == '|':  # x <=> a | b
+            clauses.extend(([-x, a, b], [x, -a], [x, -b]))
+        elif op == '=>':  # x <=> ~a | b
+            clauses.extend(([-x, -a, b], [x, a], [x, -b]))
+        else:  # x <=> (a <=> b)
+            clauses.extend(([-x, -a, b], [-x, a, -b], [x, a, b], [x, -a, -b]))
+        cache[id(node)] = (node, x)
+    return literal(tree)
+
+# Function to encode a tree as clauses, using Tseitin definitions for conjuncts that are not clauses
+def tseitin_clauses(tree, symbols, cache=None):
+    if cache is None:
+        cache = {}
+    clauses = []
+    for conjunct in conjuncts(tree):
+        clause = as_clause(conjunct)
+        if clause is None:
+            clause = [tseitin(conjunct, symbols, clauses, cache)]
+        clauses.append(list(clause))
+    return clauses
@@ -1,69 +1,220 @@
+import argparse
 import sys
-from engine import parse_file, truth_table_method
+from engine import KBReader, parse_query_file, truth_table_method
 from forward_chaining import forward_chain
 from backward_chaining import backward_chain
-from kbclass import PropDefiniteKB, KB
+from kbclass import PropDefiniteKB, PropKB, SATKB, BDDKB
+from logic import clause_text
+from session import KBSession
+import snapshot
+import stats
+import tracing
 
-from research.resolution import pl_resolution, to_cnf, conjuncts
+from research.resolution import resolution_proof
+
+# Methods whose KB is told each sentence as soon as it is read, so the input file is never held in memory
+STREAMED_METHODS = ["FC", "BC", "RES", "SAT"]
+
+# Function to create the KB a streamed method is told into, over the compiled snapshot when one is loaded
+def new_kb(method, loaded=None):
+    if method == "RES":
+        return loaded.cnf_kb() if loaded else PropKB()
+    if method == "SAT":
+        return SATKB()  # The solver is built from the sentences either way
+    kb = loaded.definite_kb() if loaded else PropDefiniteKB()
+    kb.set_method(method)
+    return kb
+
+# Function to handle `main.py compile <filename>`, writing the binary snapshot used by later runs
+def compile_command(argv):
+    parser = argparse.ArgumentParser(usage="python3 main.py compile <filename>")
+    parser.add_argument("filename")
+    args = parser.parse_args(argv)
+    path = args.filename + snapshot.SUFFIX
+    try:
+        definite, cnf = snapshot.compile_file(args.filename, path)
+    except Exception as e:
+        print(f"Error opening or reading the file: {e}")
+        sys.exit(1)
+    print(f"Compiled {args.filename} to {path}: {len(definite.symbols)} symbols, "
+          f"{len(definite.clauses)} rules, {len(cnf.clauses)} clauses")
+
+# Function to handle `main.py serve name=filename ...`, answering queries on the loaded KBs over a socket
+def serve_command(argv):
+    parser = argparse.ArgumentParser(usage="python3 main.py serve name=filename ... (--socket PATH | --port N)")
+    parser.add_argument("kbs", nargs="+", metavar="name=filename", help="KB files to load, each under a name")
+    listen = parser.add_mutually_exclusive_group(required=True)
+    listen.add_argument("--socket", metavar="PATH", help="listen on a Unix domain socket")
+    listen.add_argument("--port", type=int, help="listen on localhost TCP")
+    parser.add_argument("--workers", type=int, help="processes answering TT and RES queries (default: one per CPU)")
+    args = parser.parse_args(argv)
+    files = {}
+    for kb in args.kbs:
+        name, _, filename = kb.partition("=")
+        if not filename:
+            parser.error(f"expected name=filename, got {kb}")
+        files[name] = filename
+    import server  # Only the serve command needs asyncio
+    try:
+        kbs = {name: server.read_sentences(filename) for name, filename in files.items()}
+    except Exception as e:
+        print(f"Error opening or reading the file: {e}")
+        sys.exit(1)
+    try:
+        server.run(kbs, args.socket, args.port, args.workers)
+    except OSError as e:
+        print(f"Error starting the server: {e}")
+        sys.exit(1)
 
 # Main function to handle command-line arguments and execute the appropriate method
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python3 main.py <filename> <method>")
-        sys.exit(1)
-    
-    filename = sys.argv[1]
-    method = sys.argv[2]
-    print(f"Reading file: {filename}")
+    if len(sys.argv) > 1 and sys.argv[1] == "compile":
+        compile_command(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve_command(sys.argv[2:])
+        return
+    parser = argparse.ArgumentParser(usage="python3 main.py <filename> <method> [options]")
+    parser.add_argument("filename")
+    parser.add_argument("method")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used to enumerate TT models in parallel (default: 1)")
+    parser.add_argument("--queries", metavar="FILE",
+                        help="answer every query in FILE (one per line) instead of those after ASK")
+    parser.add_argument("--trace", nargs="?", const="info", choices=["info", "debug"],
+                        help="write inference events to stderr (default level: info)")
+    parser.add_argument("--profile", nargs="?", const="cpu", choices=stats.PROFILE_MODES,
+                        help="write phase timings, work counters and a cProfile (cpu) or tracemalloc (memory) "
+                             "report to stderr (default: cpu)")
+    parser.add_argument("--profile-output", metavar="FILE", help="write the --profile report to FILE instead")
+    args = parser.parse_args()
+    if args.profile:
+        stats.profile(lambda: answer(args), args.profile, args.profile_output)
+    else:
+        answer(args)
+
+# Function to answer the queries of a parsed command line
+def answer(args):
+    filename = args.filename
+    method = args.method
+    if args.trace:
+        tracing.enable(tracing.LEVELS[args.trace])
+
+    def note(*values):  # Working details, only shown when tracing
+        if args.trace:
+            print(*values, file=sys.stderr)
+
+    note(f"Reading file: {filename}")
+    kb = None
+    kb_sentences = None
+    loaded = None
     try:
-        kb_sentences, query = parse_file(filename)
+        loaded = snapshot.load(filename + snapshot.SUFFIX, filename)  # Up to date output of `main.py compile`
+        if loaded is not None:
+            note(f"Loaded snapshot: {filename + snapshot.SUFFIX}")
+            if method in STREAMED_METHODS:
+                kb = new_kb(method, loaded)
+                if method == "SAT":
+                    for sentence in loaded.sentences:
+                        kb.tell(sentence)
+            else:
+                kb_sentences = loaded.sentences
+            queries = loaded.queries
+        else:
+            with KBReader(filename) as reader:
+                if method in STREAMED_METHODS:
+                    kb = new_kb(method)
+                    for sentence in reader.sentences():
+                        kb.tell(sentence)
+                else:
+                    kb_sentences = list(reader.sentences())
+                queries = reader.queries()
+        if args.queries:
+            queries = parse_query_file(args.queries)
     except Exception as e:
         print(f"Error opening or reading the file: {e}")
         sys.exit(1)
 
-    print("Knowledge Base:", kb_sentences)
-    print("Query:", query)
+    try:
+        answer_queries(args, kb, kb_sentences, queries, note)
+    finally:
+        if loaded is not None:
+            loaded.close()  # The KB built over the snapshot is done with
+
+# Function to answer the queries against the KB told from the file (FC, BC, RES, SAT) or its sentences (TT, BDD)
+def answer_queries(args, kb, kb_sentences, queries, note):
+    filename = args.filename
+    method = args.method
+    if len(queries) > 1 or args.queries:  # Batch mode: one session, one result line per query
+        session = KBSession(kb_sentences or [], args.workers, filename + ".bdd")
+        if kb is not None:
+            session.adopt(method, kb)
+        failed = False
+        for query in queries:
+            try:
+                line = session.ask(query, method).line
+            except (SyntaxError, ValueError) as e:  # A malformed query or unsupported method, reported for that query
+                line = f"Error: {e}"
+                failed = True
+            print(f"{query}: {line}", flush=True)
+        if failed:
+            sys.exit(1)
+        return
+
+    query = queries[0]
+    note("Knowledge Base:", kb_sentences if kb is None else f"{len(kb.clauses)} clauses")
+    note("Query:", query)
     
-    if method == "TT":
-        result, details = truth_table_method(kb_sentences, query)
+    try:  # Sentences TT and BDD read whole, and the query, are parsed only now
+        if method == "TT":
+            result, details = truth_table_method(kb_sentences, query, args.workers)
         
-        print("Result:", result)
-        print("Details:", details)
+            note("Result:", result)
+            note("Details:", details)
         
-        if result:
-            print(f"YES: {details}")
-        else:
-            print("NO")
-    elif method == "RES":
-        class PropKB(KB):
-            def tell(self, sentence):
-                self.clauses.extend(conjuncts(to_cnf(sentence)))
-        kb = PropKB()
-        for sentence in kb_sentences:
-            kb.tell(sentence)
-        result = pl_resolution(kb, query)
-        print(f"Resolution Method: Query {query} is {'entailed' if result else 'not entailed'} by the KB.")
-        if result:
-            print("YES")
-        else:
-            print("NO")
-    else:
-        kb = PropDefiniteKB()
-        kb.set_method(method)
-        for sentence in kb_sentences:
-            kb.tell(sentence)
-        print(f"Initial Facts after parsing: {kb.initial_facts}")
-            
-        if method == "FC":
-            result = kb.forward_chain(query) # Do forward chaining to infer facts
-            print(f"YES: {', '.join(kb.derived_order)}" if query in kb.inferred else "NO")
-        elif method == "BC":
-            if kb.ask(query):
-                print(f"YES: {', '.join(kb.derived_order)}")
+            if result:
+                print(f"YES: {details}")
             else:
                 print("NO")
+        elif method == "RES":
+            result, proof = resolution_proof(kb, query)
+            for resolvent, left, right in proof:
+                note(f"Resolved {clause_text(left, kb.symbols)} and {clause_text(right, kb.symbols)} to {clause_text(resolvent, kb.symbols)}")
+            note(f"Resolution Method: Query {query} is {'entailed' if result else 'not entailed'} by the KB.")
+            if result:
+                print("YES")
+            else:
+                print("NO")
+        elif method == "SAT":
+            result = kb.ask(query)
+            note(f"SAT Method: Query {query} is {'entailed' if result else 'not entailed'} by the KB.")
+            if result:
+                print("YES")
+            else:
+                print("NO")
+        elif method == "BDD":
+            kb = BDDKB.compile(kb_sentences, filename + ".bdd")  # Reuses the compiled KB while the TELL block is unchanged
+            result = kb.ask(query)
+            if result:
+                print(f"YES: {kb.count(query)}")
+            else:
+                print("NO")
+        elif method in ["FC", "BC"]:
+            note(f"Initial Facts after parsing: {set(kb.names(kb.initial_facts))}")
+            
+            if method == "FC":
+                result = kb.forward_chain(query) # Do forward chaining to infer facts
+                print(f"YES: {', '.join(kb.names(kb.derived_order))}" if result else "NO")
+            else:
+                if kb.ask(query):
+                    print(f"YES: {', '.join(kb.names(kb.derived_order))}")
+                else:
+                    print("NO")
         else:
             print(f"Unsupported Method: {method}") # Validation
+    except SyntaxError as e:  # Reported as the streamed methods report a malformed sentence while reading
+        print(f"Error opening or reading the file: {e}")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -1,191 +1,132 @@
-class Expr:
-    def __init__(self, op, *args):
-        self.op = op # Operator of the expressions
-        self.args = args # Arguments of the expressions
-
-    def __repr__(self):
-        if not self.args: # If there are no arguments, return the operator itself
-            return self.op
-        elif len(self.args) == 1: # Unary Operator
-            return self.op + repr(self.args[0])
-        else: # Binary Operator
-            return '(' + (' ' + self.op + ' ').join(map(repr, self.args)) + ')'
-
-    def __invert__(self):
-        return Expr('~', self) # Negation
-
-    def __or__(self, other):
-        return Expr('|', self, other) # Disjunction
-
-    def __and__(self, other):
-        return Expr('&', self, other) # Conjunction
-
-    def __eq__(self, other):
-        return Expr('<=>', self, other) # Equivalence 
-
-    def __rshift__(self, other):
-        return Expr('==>', self, other) # Implication
-
-    def __lshift__(self, other):
-        return Expr('<==', self, other) # Reverse Implication
-
-def expr(x):
-    if isinstance(x, Expr):
-        return x
-    elif isinstance(x, str):
-        return Expr(x) # Convert string to Expr
-    raise ValueError(f"Cannot convert {x} to an Expr")
-
-def is_symbol(s):
-    return isinstance(s, str) and s[0].isalpha() # Check if string is a symbol
-
-def unique(seq):
-    return list(set(seq)) # Return unique elements in a sequence 
-
-def remove_all(item, seq):
-    return [x for x in seq if x != item] # Remove all instances of item from sequence
-
-def to_cnf(s):
-    s = expr(s)
-    s = eliminate_implications(s) # Eliminate Implications
-    s = move_not_inwards(s) # Move negation inwards
-    return distribute_and_over_or(s) # Distribute AND over OR
-
-def eliminate_implications(s):
-    s = expr(s)
-    if not s.args or is_symbol(s.op):
-        return s # Atoms are unchanged
-    args = list(map(eliminate_implications, s.args))
-    a, b = args[0], args[-1]
-    if s.op == '==>':
-        return b | ~a # p => q is equivalent to ~p | q
-    elif s.op == '<==':
-        return a | ~b # q <= p is equivalent to ~q | p
-    elif s.op == '<=>':
-        return (a | ~b) & (b | ~a) # p <=> q is equivalent to (p => q) & (q => p)
-    elif s.op == '^':
-        assert len(args) == 2
-        return (a & ~b) | (~a & b) # p XOR q is equivalent to (p & ~q) | (~p & q)
-    else:
-        assert s.op in ('&', '|', '~') 
-        return Expr(s.op, *args) # keep the same operator
-
-def move_not_inwards(s):
-    s = expr(s)
-    if s.op == '~': # Negation
-        def NOT(b):
-            return move_not_inwards(~b)
-        a = s.args[0]
-        if a.op == '~':
-            return move_not_inwards(a.args[0]) # ~~A is equivalent to A
-        if a.op == '&':
-            return associate('|', list(map(NOT, a.args))) # De morgan's law
-        if a.op == '|':
-            return associate('&', list(map(NOT, a.args))) # Same de morgan law
-        return s
-    elif is_symbol(s.op) or not s.args:
-        return s # Returns if its a symbol or has no arguments
-    else:
-        return Expr(s.op, *list(map(move_not_inwards, s.args))) # Recursively  apply to arguments
-
-def distribute_and_over_or(s):
-    s = expr(s)
-    if s.op == '|':
-        s = associate('|', s.args)
-        if s.op != '|':
-            return distribute_and_over_or(s)
-        if len(s.args) == 0:
-            return False
-        if len(s.args) == 1:
-            return distribute_and_over_or(s.args[0])
-        conj = first(arg for arg in s.args if arg.op == '&')
-        if not conj:
-            return s
-        others = [a for a in s.args if a is not conj]
-        rest = associate('|', others)
-        return associate('&', [distribute_and_over_or(c | rest)
-                               for c in conj.args])
-    elif s.op == '&':
-        return associate('&', list(map(distribute_and_over_or, s.args)))
-    else:
-        return s
-
-def associate(op, args):
-    args = dissociate(op, args)
-    if len(args) == 0:
-        return _op_identity[op]
-    elif len(args) == 1:
-        return args[0]
-    else:
-        return Expr(op, *args)
-
-_op_identity = {'&': True, '|': False, '+': 0, '*': 1}
-
-def dissociate(op, args):
-    result = []
-
-    def collect(subargs):
-        for arg in subargs:
-            if arg.op == op:
-                collect(arg.args)
-            else:
-                result.append(arg)
-
-    collect(args)
-    return result
-
-def conjuncts(s):
-    return dissociate('&', [s]) # Returns the conjuncts in the sentence
-
-def disjuncts(s):
-    return dissociate('|', [s]) # Return the disjuncts in the sentence
- 
-def pl_resolution(kb, alpha): 
-    clauses = kb.clauses + conjuncts(to_cnf(~expr(alpha))) # Add negation of alpha to clauses
-    new = set()
-    while True:
-        n = len(clauses)
-        pairs = [(clauses[i], clauses[j])
-                 for i in range(n) for j in range(i + 1, n)]
-        for (ci, cj) in pairs:
-            resolvents = pl_resolve(ci, cj) # Resolve pairs of clauses
-            if False in resolvents: # Found an empty clause
-                return True
-            new = new.union(set(resolvents))
-        if new.issubset(set(clauses)): # No new clauses
-            return False
-        for c in new:
-            if c not in clauses:
-                clauses.append(c)
-
-def pl_resolve(ci, cj):
-    clauses = []
-    for di in disjuncts(ci):
-        for dj in disjuncts(cj):
-            if di == ~dj or ~di == dj: # Complementary literals
-                clauses.append(associate('|', unique(remove_all(di, disjuncts(ci)) + remove_all(dj, disjuncts(cj)))))
-    return clauses
-
-def parse_kb_and_query(file_content): # Separate parsing for simplicity
-    lines = file_content.strip().split('\n')
-    kb_sentences = []
-    query = None
-    mode = None
-
-    for line in lines:
-        if line.startswith('TELL'):
-            mode = 'TELL'
+import heapq
+import stats
+import tracing
+from logic import parse, to_clauses
+from sat import Solver
+
+# Propositional resolution over the CNF clauses of a PropKB, converted by logic.to_clauses
+
+def pl_resolution(kb, alpha):
+    return resolution_proof(kb, alpha)[0]
+
+# Given-clause resolution with set of support
+# Clauses are frozensets of signed symbol ids; the KB clauses are the usable set and only the
+# negated query (and what is derived from it) is selected as a given clause, so every pair of
+# clauses is resolved at most once and two KB clauses are never resolved together.
+# Set of support is complete when the KB itself is satisfiable, so that is checked first.
+# Returns (entailed, proof) where proof lists (resolvent, parent, parent) steps ending in the empty clause
+def resolution_proof(kb, alpha):
+    clauses = {} # Clause id -> clause
+    parents = {} # Clause id -> ids of the two clauses it was resolved from, None for input clauses
+    occurs = {} # Literal -> ids of the processed clauses containing it
+    seen = {} # Every clause generated so far -> its id, to skip duplicates
+    support = [] # Heap of (size, id) for unprocessed clauses, smallest first
+    collected = stats.current
+    pairs = dropped = 0 # Pairs resolved and clauses dropped by subsumption, for the stats
+
+    def add(clause, origin):
+        if clause in seen or is_tautology(clause):
+            return None
+        clause_id = len(clauses)
+        seen[clause] = clause_id
+        clauses[clause_id] = clause
+        parents[clause_id] = origin
+        return clause_id
+
+    def subsumed(clause, own=None): # Forward subsumption: a processed clause other than own is a subset of clause
+        nonlocal dropped
+        if any(other != own and clauses[other] <= clause for lit in clause for other in occurs.get(lit, ())):
+            dropped += 1
+            return True
+        return False
+
+    def remove_subsumed(clause_id): # Backward subsumption: drop other processed clauses that are supersets of it
+        nonlocal dropped
+        clause = clauses[clause_id]
+        candidates = min((occurs.get(lit, set()) for lit in clause), key=len)
+        for other in [other for other in candidates if other != clause_id and clause <= clauses[other]]:
+            dropped += 1
+            for lit in clauses[other]:
+                occurs[lit].discard(other)
+
+    def process(clause_id):
+        remove_subsumed(clause_id)
+        for lit in clauses[clause_id]:
+            occurs.setdefault(lit, set()).add(clause_id)
+
+    with stats.phase('solve'):
+        if not satisfiable(kb.clauses):
+            return False, [] # A KB without models answers NO, as in TT
+
+    for clause in kb.clauses:
+        clause_id = add(clause, None)
+        if clause_id is not None and not subsumed(clause):
+            process(clause_id)
+
+    with stats.phase('cnf'):
+        negated = to_clauses(('~', parse(alpha, kb.symbols)), kb.symbols) # Add negation of alpha as the set of support
+    for clause in negated:
+        clause_id = seen.get(clause) # A negated query clause that is also a KB clause still joins the set of support
+        if clause_id is None:
+            clause_id = add(clause, None)
+        if clause_id is not None:
+            heapq.heappush(support, (len(clause), clause_id))
+
+    trace = tracing.tracer(tracing.INFO)
+
+    def given_clause_loop():
+        nonlocal pairs
+        while support:
+            _, given_id = heapq.heappop(support)
+            given = clauses[given_id]
+            if subsumed(given, given_id):
+                continue
+            for lit in given:
+                others = list(occurs.get(-lit, ())) # Only clauses holding the complementary literal can resolve
+                pairs += len(others)
+                for other_id in others:
+                    resolvent = (given - {lit}) | (clauses[other_id] - {-lit})
+                    if resolvent in seen or is_tautology(resolvent) or subsumed(resolvent):
+                        continue
+                    resolvent_id = add(resolvent, (given_id, other_id))
+                    if trace is not None:
+                        trace(tracing.CLAUSE_RESOLVED, left=given, right=clauses[other_id], resolvent=resolvent,
+                              symbols=kb.symbols)
+                    if not resolvent: # Found an empty clause
+                        return True, proof_steps(resolvent_id, clauses, parents)
+                    heapq.heappush(support, (len(resolvent), resolvent_id))
+            process(given_id)
+        return False, [] # No new clauses
+
+    inputs = len(clauses)
+    with stats.phase('resolve'):
+        entailed, proof = given_clause_loop()
+    if collected is not None:
+        collected.add(pairs_resolved=pairs, resolvents=len(clauses) - inputs, clauses_subsumed=dropped)
+    return entailed, proof
+
+def satisfiable(clauses):
+    solver = Solver()
+    return all(solver.add_clause(clause) for clause in clauses) and solver.solve()
+
+def is_tautology(clause):
+    return any(-lit in clause for lit in clause) # Contains a literal and its negation
+
+def proof_steps(clause_id, clauses, parents):
+    steps = []
+    pending = [clause_id]
+    done = set()
+    while pending:
+        current = pending[-1]
+        origin = parents[current]
+        if origin is None or current in done:
+            pending.pop()
             continue
-        elif line.startswith('ASK'):
-            mode = 'ASK'
+        waiting = [parent for parent in origin if parents[parent] is not None and parent not in done]
+        if waiting:
+            pending.extend(waiting) # Derive the parents before the resolvent
             continue
-        
-        if mode == 'TELL':
-            kb_sentences.append(line.strip().rstrip(';'))
-        elif mode == 'ASK':
-            query = line.strip().rstrip(';')
-
-    return ' & '.join(kb_sentences), query
-
-
-
+        pending.pop()
+        done.add(current)
+        steps.append((clauses[current], clauses[origin[0]], clauses[origin[1]]))
+    return steps
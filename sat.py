@@ -0,0 +1,251 @@
+import heapq
+
+# CDCL SAT solver over clauses of signed variable ids (DIMACS style: 3 is x3, -3 is ~x3)
+# Internally a literal is coded as 2 * var + sign so that code ^ 1 is its negation.
+# Two watched literals per clause drive unit propagation, conflicts are analysed to the first
+# unique implication point, the learnt clause decides how far to backjump, and branching picks
+# the unassigned variable with the highest VSIDS activity using its saved phase.
+
+TRUE, FALSE, UNASSIGNED = 1, -1, 0
+RESTART_BASE = 100  # Conflicts before the first restart, scaled by the Luby sequence
+ACTIVITY_DECAY = 0.95
+ACTIVITY_LIMIT = 1e100
+
+
+def code(lit):
+    return 2 * lit if lit > 0 else -2 * lit + 1
+
+def luby(i):  # i-th element (from 0) of the Luby restart sequence 1 1 2 1 1 2 4 ...
+    size, power = 1, 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        power -= 1
+        i = i % size
+    return 1 << power
+
+
+class Solver:
+    def __init__(self, num_vars=0):
+        self.num_vars = 0
+        self.values = [UNASSIGNED, UNASSIGNED]  # Indexed by literal code
+        self.level = [0]  # Indexed by var
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]  # Last value of each var, reused when branching on it
+        self.watches = [[], []]  # Literal code -> clauses watching that literal
+        self.clauses = []
+        self.learnts = []
+        self.trail = []
+        self.trail_lim = []  # Trail position where each decision level starts
+        self.qhead = 0  # Next trail position to propagate
+        self.order = []  # Max-heap of (-activity, var), entries go stale and are skipped
+        self.bump = 1.0
+        self.ok = True  # False once the clauses are unsatisfiable without assumptions
+        self.conflicts = 0
+        self.last_model = None
+        self.ensure_vars(num_vars)
+
+    def ensure_vars(self, num_vars):
+        while self.num_vars < num_vars:
+            self.num_vars += 1
+            self.values.extend((UNASSIGNED, UNASSIGNED))
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.phase.append(False)
+            self.watches.extend(([], []))
+            heapq.heappush(self.order, (0.0, self.num_vars))
+
+    def value(self, lit):  # Value of a signed literal
+        return self.values[code(lit)]
+
+    def model(self):  # Signed literals of the current assignment
+        return [var if self.values[2 * var] == TRUE else -var for var in range(1, self.num_vars + 1)]
+
+    def add_clause(self, lits):  # Adds a clause at decision level 0, returns False once the solver is unsat
+        if not self.ok:
+            return False
+        self.ensure_vars(max((abs(lit) for lit in lits), default=0))
+        clause = []
+        for lit in set(code(lit) for lit in lits):
+            if lit ^ 1 in clause or self.values[lit] == TRUE:
+                return True  # Tautology or already satisfied
+            if self.values[lit] != FALSE:
+                clause.append(lit)
+        if not clause:
+            self.ok = False
+            return False
+        if len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+            return self.ok
+        self.attach(clause)
+        self.clauses.append(clause)
+        return True
+
+    def attach(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def assign(self, lit, reason):
+        var = lit >> 1
+        self.values[lit] = TRUE
+        self.values[lit ^ 1] = FALSE
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def propagate(self):  # Returns a conflicting clause, or None when propagation completes
+        values = self.values
+        watches = self.watches
+        while self.qhead < len(self.trail):
+            false_lit = self.trail[self.qhead] ^ 1
+            self.qhead += 1
+            watching = watches[false_lit]
+            kept = []
+            i = 0
+            while i < len(watching):
+                clause = watching[i]
+                i += 1
+                if clause[0] == false_lit:  # Keep the false watch in position 1
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                if values[first] == TRUE:
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    if values[clause[k]] != FALSE:  # Found a new literal to watch
+                        clause[1], clause[k] = clause[k], false_lit
+                        watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if values[first] == FALSE:  # Every literal is false
+                        kept.extend(watching[i:])
+                        watches[false_lit] = kept
+                        self.qhead = len(self.trail)
+                        return clause
+                    self.assign(first, clause)  # Unit clause
+            watches[false_lit] = kept
+        return None
+
+    def analyze(self, conflict):  # First-UIP learning, returns (learnt clause, backjump level)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        current = len(self.trail_lim)
+        lit = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for other in (clause if lit is None else clause[1:]):
+                var = other >> 1
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self.bump_var(var)
+                    if self.level[var] == current:
+                        pending += 1
+                    else:
+                        learnt.append(other)
+            while (self.trail[index] >> 1) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            clause = self.reason[lit >> 1]
+            seen.discard(lit >> 1)
+            pending -= 1
+            if pending == 0:
+                break
+        learnt[0] = lit ^ 1
+        if len(learnt) == 1:
+            return learnt, 0
+        deepest = max(range(1, len(learnt)), key=lambda k: self.level[learnt[k] >> 1])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]  # Watch the literal of the backjump level
+        return learnt, self.level[learnt[1] >> 1]
+
+    def bump_var(self, var):
+        self.activity[var] += self.bump
+        if self.activity[var] > ACTIVITY_LIMIT:  # Rescale to keep activities in floating point range
+            self.activity = [activity / ACTIVITY_LIMIT for activity in self.activity]
+            self.bump /= ACTIVITY_LIMIT
+            self.rebuild_order()
+
+    def rebuild_order(self):  # Drops stale heap entries; assigned vars are pushed again when unassigned
+        self.order = [(-self.activity[v], v) for v in range(1, self.num_vars + 1) if self.values[2 * v] == UNASSIGNED]
+        heapq.heapify(self.order)
+
+    def backjump(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            var = lit >> 1
+            self.phase[var] = not lit & 1
+            self.values[lit] = self.values[lit ^ 1] = UNASSIGNED
+            self.reason[var] = None
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+        if len(self.order) > 4 * self.num_vars:
+            self.rebuild_order()
+
+    def pick_branch(self):
+        while self.order:
+            _, var = heapq.heappop(self.order)
+            if self.values[2 * var] == UNASSIGNED:
+                return 2 * var + (0 if self.phase[var] else 1)
+        return None
+
+    def solve(self, assumptions=()):  # True if satisfiable with every assumed literal true
+        if not self.ok:
+            return False
+        self.ensure_vars(max((abs(lit) for lit in assumptions), default=0))
+        assumed = [code(lit) for lit in assumptions]
+        restarts = 0
+        budget = RESTART_BASE * luby(restarts)
+        try:
+            while True:
+                conflict = self.propagate()
+                if conflict is not None:
+                    self.conflicts += 1
+                    budget -= 1
+                    if not self.trail_lim:
+                        self.ok = False
+                        return False
+                    learnt, level = self.analyze(conflict)
+                    self.backjump(level)
+                    if len(learnt) == 1:
+                        self.assign(learnt[0], None)
+                    else:
+                        self.attach(learnt)
+                        self.learnts.append(learnt)
+                        self.assign(learnt[0], learnt)
+                    self.bump /= ACTIVITY_DECAY
+                    continue
+                if budget <= 0:  # Restart, keeping learnt clauses and saved phases
+                    restarts += 1
+                    budget = RESTART_BASE * luby(restarts)
+                    self.backjump(0)
+                    continue
+                lit = None
+                while len(self.trail_lim) < len(assumed):  # Assumptions are the first decisions
+                    assumption = assumed[len(self.trail_lim)]
+                    if self.values[assumption] == FALSE:
+                        return False
+                    self.trail_lim.append(len(self.trail))
+                    if self.values[assumption] == UNASSIGNED:
+                        lit = assumption
+                        break
+                if lit is None:
+                    lit = self.pick_branch()
+                    if lit is None:
+                        self.last_model = self.model()  # Every variable is assigned without conflict
+                        return True
+                    self.trail_lim.append(len(self.trail))
+                self.assign(lit, None)
+        finally:
+            self.backjump(0)  # Leave level 0 so clauses can be added between calls
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from engine import KBReader, normalize
+from session import KBSession
+import snapshot
+
+# Long-running inference server: loads named KBs once and answers requests over a Unix domain socket
+# or localhost TCP, so callers skip the start-up, parsing and indexing cost of one main.py run per question.
+# Requests and responses are JSON objects, one per line:
+#     {"id": 1, "op": "ask", "kb": "family", "query": "d", "method": "FC"}
+#     {"id": 2, "op": "tell", "kb": "family", "sentence": "a => d"}
+#     {"id": 3, "op": "retract", "kb": "family", "sentence": "a => d"}
+# An ask answers {"id": 1, "ok": true, "entailed": true, "line": "YES: a, d", "count": null, "derived": ["a", "d"]},
+# where line is what main.py prints; updates answer {"id": 2, "ok": true}, and failures {"id": 2, "ok": false,
+# "error": "..."}. The id is optional and copied back as given.
+# Each KB has a lock, so an update never interleaves with another request on the same KB. TT and RES queries
+# are answered in a process pool from the sentences current when they were asked, outside the lock, so the
+# event loop and the other KBs stay responsive while they run. A query goes to the pool with only the KB
+# version; the sentences follow only when the worker it reached has no session for that version yet.
+
+LOCALHOST = "127.0.0.1"  # The only TCP address served: tell and retract are not authenticated
+POOLED_METHODS = ["TT", "RES"]  # Methods whose queries run in the worker pool
+MAX_LINE = 1 << 24  # Longest request line accepted, in bytes
+
+worker_sessions = {}  # In a pool worker: KB name -> (version, session over the sentences of that version)
+
+
+# Function run in a pool worker; keeps one session per KB so later queries on the same version reuse it
+# Returns None when the worker has no session for the version and no sentences were sent to build one.
+def pooled_ask(name, version, query, method, sentences=None):
+    cached = worker_sessions.get(name)
+    if cached is None or cached[0] != version:
+        if sentences is None:
+            return None
+        cached = worker_sessions[name] = (version, KBSession(sentences))
+    return cached[1].ask(query, method)
+
+# Function to read the sentences of a TELL/ASK file, from its compiled snapshot when one is up to date
+def read_sentences(filename):
+    loaded = snapshot.load(filename + snapshot.SUFFIX, filename)
+    if loaded is not None:
+        with loaded:
+            return loaded.sentences
+    with KBReader(filename) as reader:
+        return list(reader.sentences())
+
+
+class ServedKB:  # A named KB with the session answering it and the lock guarding it
+    def __init__(self, name, sentences):
+        self.name = name
+        self.session = KBSession([normalize(sentence) for sentence in sentences])
+        self.version = 0  # Bumped by every update, so pool workers know when their session is stale
+        self.snapshot = None  # (version, sentences) last handed to the pool
+        self.lock = asyncio.Lock()
+
+    def sentences(self):  # The current sentences as a tuple, shared by the pooled queries of one version
+        if self.snapshot is None or self.snapshot[0] != self.version:
+            self.snapshot = (self.version, tuple(self.session.sentences))
+        return self.snapshot[1]
+
+
+class InferenceServer:
+    def __init__(self, kbs, workers=None):
+        self.kbs = {name: ServedKB(name, sentences) for name, sentences in kbs.items()}
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+
+    async def handle(self, request):  # Answers one decoded request, raising on a bad one
+        op = request.get("op")
+        kb = self.kbs.get(request.get("kb"))
+        if kb is None:
+            raise ValueError(f"Unknown KB: {request.get('kb')}")
+        if op == "ask":
+            return await self.ask(kb, request["query"], request.get("method", "FC"))
+        if op not in ("tell", "retract"):
+            raise ValueError(f"Unsupported op: {op}")
+        sentence = normalize(request["sentence"])  # Token form, as the KB was loaded, so B=>C retracts a told B => C
+        async with kb.lock:
+            if op == "tell":
+                kb.session.tell(sentence)
+            else:
+                kb.session.retract(sentence)
+            kb.version += 1
+        return {}
+
+    async def ask(self, kb, query, method):
+        if method in POOLED_METHODS:
+            async with kb.lock:  # Only while taking the sentences the query is answered from
+                version, sentences = kb.version, kb.sentences()
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.pool, pooled_ask, kb.name, version, query, method)
+            if result is None:  # Sent again with the sentences, for whichever worker takes it to build its session
+                result = await loop.run_in_executor(self.pool, pooled_ask, kb.name, version, query, method, sentences)
+        else:
+            async with kb.lock:  # These engines update their state while answering
+                result = kb.session.ask(query, method)
+        return {"entailed": result.entailed, "line": result.line, "count": result.count, "derived": result.derived}
+
+    async def respond(self, line):  # Answers one request line with one response line
+        response = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request is not a JSON object")
+            if "id" in request:
+                response["id"] = request["id"]
+            response.update(await self.handle(request))
+            response["ok"] = True
+        except KeyError as e:
+            response.update(ok=False, error=f"Missing field: {e.args[0]}")
+        except Exception as e:  # Parse errors, unknown methods and the like go back to the client
+            response.update(ok=False, error=str(e) or type(e).__name__)
+        return json.dumps(response) + "\n"
+
+    async def serve_client(self, reader, writer):  # Requests on one connection are answered in order
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # Longer than MAX_LINE
+                    writer.write(json.dumps({"ok": False, "error": "Request too long"}).encode() + b"\n")
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    writer.write((await self.respond(line)).encode())
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, path=None, port=None):  # Listens on the Unix socket path, else on localhost TCP port
+        if path is not None:
+            server = await asyncio.start_unix_server(self.serve_client, path, limit=MAX_LINE)
+        else:
+            server = await asyncio.start_server(self.serve_client, LOCALHOST, port, limit=MAX_LINE)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if path is not None:
+                os.unlink(path)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+# Function to serve the KBs, name -> sentences, until interrupted
+def run(kbs, path=None, port=None, workers=None):
+    server = InferenceServer(kbs, workers)
+    try:
+        asyncio.run(server.serve(path, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
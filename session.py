@@ -0,0 +1,216 @@
+from collections import namedtuple
+from engine import (CHUNK_BITS, MAX_ENUMERATED_SYMBOLS, chunk_columns, compiled, evaluator, kb_chunks, normalize,
+                    parse_file_queries, symbol_columns, truth_table_method)
+from kbclass import PropDefiniteKB, PropKB, SATKB, BDDKB
+from logic import SymbolTable, parse
+from research.resolution import resolution_proof
+import stats
+
+# Persistent KB session: the KB is told once and each method builds its index, closure or
+# compiled form on first use, then reuses it for every later query against the same TELL block.
+
+Result = namedtuple('Result', 'query method entailed count derived line')  # line is what main prints
+
+
+class TruthTableEngine:  # Keeps the KB models found by enumeration, so a query only evaluates over them
+    def __init__(self, sentences, workers=1):
+        self.sentences = sentences
+        self.workers = workers
+        self.table = SymbolTable()
+        with stats.phase('parse'):
+            kb_evaluators = [evaluator(sentence, self.table) for sentence in sentences]
+        n = len(self.table)
+        self.enumerated = workers == 1 and n <= MAX_ENUMERATED_SYMBOLS
+        if not self.enumerated:
+            return
+        self.width = min(n, CHUNK_BITS)
+        self.low_columns, self.mask = chunk_columns(self.width)
+        with stats.phase('enumerate'):  # (chunk, bits of the KB models in the chunk) for chunks holding any
+            self.models = [(chunk, kb_bits) for chunk, _, kb_bits in kb_chunks(
+                kb_evaluators, n, self.width, 0, 1 << (n - self.width), self.low_columns, self.mask) if kb_bits]
+        self.count = sum(kb_bits.bit_count() for chunk, kb_bits in self.models)
+        if stats.current is not None:
+            stats.current.add(models_evaluated=1 << n, kb_models=self.count)
+
+    def ask(self, query):
+        names, _ = compiled(normalize(query))
+        if not self.enumerated or any(name not in self.table for name in names):
+            entailed, count = truth_table_method(self.sentences, query, self.workers)  # The model space changes
+        else:
+            query_evaluator = evaluator(query, self.table)
+            n = len(self.table)
+            entailed = bool(self.models) and all(
+                not kb_bits & ~query_evaluator(symbol_columns(n, self.width, chunk, self.low_columns, self.mask),
+                                               self.mask)
+                for chunk, kb_bits in self.models)
+            count = self.count
+        return Result(query, "TT", entailed, count, None, f"YES: {count}" if entailed else "NO")
+
+
+class ForwardChainingEngine:  # Computes the closure once; a query is answered from it in O(answer) time
+    # The printed derivation is the order a fresh run over the current KB would follow, which a tell or
+    # retract can change anywhere, so updates keep only the closure current and the order is rebuilt
+    # by the first entailed query after them.
+    def __init__(self, sentences, kb=None):
+        self.kb = kb if kb is not None else PropDefiniteKB()
+        self.kb.set_method("FC")
+        for sentence in sentences:
+            self.kb.tell(sentence)
+        self.kb.saturate()
+        self.index_order(self.kb.derived_order)
+
+    def index_order(self, order):
+        self.order = list(order)
+        self.position = {symbol: i for i, symbol in enumerate(self.order)}
+
+    def tell(self, sentence):  # The saturated KB propagates only what the sentence adds
+        self.kb.tell(sentence)
+        self.order = None
+
+    def retract(self, sentence):
+        self.kb.retract(sentence)
+        self.order = None
+
+    def ask(self, query):
+        atoms = self.kb.query_atoms(query)
+        if atoms is None or not all(atom in self.kb.inferred for atom in atoms):
+            return Result(query, "FC", False, None, None, "NO")
+        if self.order is None:
+            self.index_order(self.kb.closure_order())
+        # A fresh run starts with every initial fact and stops once the last query symbol is derived,
+        # so it prints the closure order up to that symbol and at least the initial facts
+        cut = max([len(self.kb.initial_facts) - 1] + [self.position[atom] for atom in atoms])
+        derived = self.order[:cut + 1]
+        for goal in atoms:  # Moves the query to the end of the derived order
+            derived.remove(goal)
+            derived.append(goal)
+        derived = self.kb.names(derived)
+        return Result(query, "FC", True, None, derived, f"YES: {', '.join(derived)}")
+
+
+class BackwardChainingEngine:  # Reuses the parsed rules and conclusion index across queries
+    def __init__(self, sentences, kb=None):
+        self.kb = kb if kb is not None else PropDefiniteKB()
+        self.kb.set_method("BC")
+        for sentence in sentences:
+            self.kb.tell(sentence)
+
+    def tell(self, sentence):
+        self.kb.tell(sentence)
+
+    def retract(self, sentence):
+        self.kb.retract(sentence)
+
+    def ask(self, query):
+        self.kb.inferred = set(self.kb.initial_facts)  # Each query reports its own proof
+        self.kb.derived_order = []
+        entailed = self.kb.ask(query)
+        derived = self.kb.names(self.kb.derived_order) if entailed else None
+        return Result(query, "BC", entailed, None, derived, f"YES: {', '.join(derived)}" if entailed else "NO")
+
+
+class ResolutionEngine:  # Reuses the CNF clauses of the KB across queries
+    def __init__(self, sentences, kb=None):
+        self.kb = kb if kb is not None else PropKB()
+        for sentence in sentences:
+            self.kb.tell(sentence)
+
+    def tell(self, sentence):
+        self.kb.tell(sentence)
+
+    def ask(self, query):
+        entailed, proof = resolution_proof(self.kb, query)
+        return Result(query, "RES", entailed, None, None, "YES" if entailed else "NO")
+
+
+class SATEngine:  # Reuses the solver, with its learnt clauses, across queries
+    def __init__(self, sentences, kb=None):
+        self.kb = kb if kb is not None else SATKB()
+        for sentence in sentences:
+            self.kb.tell(sentence)
+
+    def tell(self, sentence):  # Only adds clauses, so the learnt clauses stay valid
+        self.kb.tell(sentence)
+
+    def ask(self, query):
+        entailed = self.kb.ask(query)
+        return Result(query, "SAT", entailed, None, None, "YES" if entailed else "NO")
+
+
+class BDDEngine:  # Compiles the KB once, loading it from path when given and up to date
+    def __init__(self, sentences, path=None):
+        self.kb = BDDKB.compile(sentences, path)
+
+    def tell(self, sentence):  # Conjoins the sentence; the cached file no longer matches and is rebuilt next time
+        self.kb.tell(sentence)
+
+    def ask(self, query):
+        entailed = self.kb.ask(query)
+        count = self.kb.count(query) if entailed else None
+        return Result(query, "BDD", entailed, count, None, f"YES: {count}" if entailed else "NO")
+
+
+# Session engines that can take over a KB already told elsewhere, e.g. while streaming the input file
+KB_ENGINES = {"FC": ForwardChainingEngine, "BC": BackwardChainingEngine, "RES": ResolutionEngine, "SAT": SATEngine}
+
+
+class KBSession:
+    def __init__(self, sentences, workers=1, compiled_path=None):
+        self.sentences = list(sentences)
+        self.workers = workers
+        self.compiled_path = compiled_path  # Where the BDD method caches the compiled KB
+        self.engines = {}  # Method -> engine built on first use
+
+    def engine(self, method):
+        engine = self.engines.get(method)
+        if engine is None:
+            if method == "TT":
+                engine = TruthTableEngine(self.sentences, self.workers)
+            elif method == "FC":
+                engine = ForwardChainingEngine(self.sentences)
+            elif method == "BC":
+                engine = BackwardChainingEngine(self.sentences)
+            elif method == "RES":
+                engine = ResolutionEngine(self.sentences)
+            elif method == "SAT":
+                engine = SATEngine(self.sentences)
+            elif method == "BDD":
+                engine = BDDEngine(self.sentences, self.compiled_path)
+            else:
+                raise ValueError(f"Unsupported Method: {method}")
+            self.engines[method] = engine
+        return engine
+
+    def adopt(self, method, kb):  # Answers method from a KB told with the session sentences
+        self.engines[method] = KB_ENGINES[method]((), kb)
+
+    def ask(self, query, method):
+        return self.engine(method).ask(query)
+
+    # Functions to update the session KB; engines that cannot take the change are dropped and rebuilt on their next query
+    def tell(self, sentence):
+        parse(sentence, SymbolTable())  # A malformed sentence raises here, before the KB or any engine changes
+        self.sentences.append(sentence)
+        for method, engine in list(self.engines.items()):
+            if hasattr(engine, 'tell'):
+                engine.tell(sentence)
+            else:
+                del self.engines[method]
+
+    def retract(self, sentence):
+        if sentence not in self.sentences:
+            raise ValueError(f"Sentence not in KB: {sentence}")
+        self.sentences.remove(sentence)
+        for method, engine in list(self.engines.items()):
+            if hasattr(engine, 'retract'):
+                engine.retract(sentence)
+            else:
+                del self.engines[method]
+
+
+# Function to answer every query of a TELL/ASK file with each method in-process, one Result per (query, method)
+# Results carry the line main.py would print, so callers can check answers without running it as a subprocess.
+def answer_file(filename, methods, workers=1):
+    sentences, queries = parse_file_queries(filename)
+    session = KBSession(sentences, workers)
+    return [session.ask(query, method) for query in queries for method in methods]
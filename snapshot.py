@@ -0,0 +1,174 @@
+import hashlib
+import mmap
+import struct
+import sys
+from array import array
+from clausestore import ClauseStore, RuleStore, SymbolIndex
+from engine import KBReader
+from kbclass import PropDefiniteKB, PropKB
+from logic import SymbolTable
+
+# Binary KB snapshots, written by `main.py compile <file>` next to the input file as <file>.kbs
+# Layout: a header (magic, format version, byte order, sha256 of the source file, section count),
+# a table of (name, offset, length) entries, then the sections, each aligned to 8 bytes.
+# Int sections are raw native array('i') data, so loading maps the file and casts memoryviews over
+# it: clause stores and indexes read the mapped pages directly and nothing is parsed or copied.
+# The map is copy-on-write, so retracting a rule marks it in memory without touching the file.
+
+MAGIC = b'KBSNAP\0\0'
+FORMAT_VERSION = 1
+SUFFIX = '.kbs'
+HEADER = struct.Struct('<8sIc32sI')  # magic, version, byte order, source hash, number of sections
+ENTRY = struct.Struct('<24sQQ')  # section name, offset, length in bytes
+ALIGN = 8
+BYTE_ORDER = b'l' if sys.byteorder == 'little' else b'b'
+
+
+# Function to hash the source file, read in blocks so it is never held in memory
+def source_hash(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.digest()
+
+# Function to compile a TELL/ASK file into a snapshot at path; returns the FC/BC KB and the CNF KB
+def compile_file(filename, path=None):
+    path = path or filename + SUFFIX
+    definite = PropDefiniteKB()
+    cnf = PropKB()
+    cnf.symbols = definite.symbols  # One table for both, including the symbols naming CNF subformulas
+    sentences = []
+    with KBReader(filename) as reader:
+        for sentence in reader.sentences():
+            definite.tell(sentence)
+            cnf.tell(sentence)
+            sentences.append(sentence)
+        queries = reader.queries()
+
+    num_symbols = len(definite.symbols)
+    rules = definite.clauses
+    conclusion_offsets, conclusion_rules = definite.conclusion_index.csr(num_symbols)
+    premise_offsets, premise_rules = definite.premise_index.csr(num_symbols)
+    facts = array('i', sorted(fact for fact, count in definite.fact_counts.items() for _ in range(count)))
+    sections = [
+        ('symbols', '\n'.join(definite.symbols.symbols()).encode()),
+        ('sentences', '\n'.join(sentences).encode()),
+        ('queries', '\n'.join(queries).encode()),
+        ('cnf.literals', cnf.clauses.literals), ('cnf.offsets', cnf.clauses.offsets),
+        ('rules.heads', rules.heads), ('rules.premises', rules.premises), ('rules.offsets', rules.offsets),
+        ('facts', facts),
+        ('conclusions.offsets', conclusion_offsets), ('conclusions.rules', conclusion_rules),
+        ('premises.offsets', premise_offsets), ('premises.rules', premise_rules),
+    ]
+    write(path, source_hash(filename), sections)
+    return definite, cnf
+
+def write(path, digest, sections):
+    offset = HEADER.size + ENTRY.size * len(sections)
+    entries = []
+    for name, data in sections:
+        offset += -offset % ALIGN
+        size = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        entries.append(ENTRY.pack(name.encode(), offset, size))
+        offset += size
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER, digest, len(sections)))
+        file.writelines(entries)
+        for name, data in sections:
+            file.write(b'\0' * (-file.tell() % ALIGN))
+            file.write(data if isinstance(data, bytes) else data.tobytes())
+
+
+class Snapshot:  # A mapped snapshot; KBs built from it read its int sections in place, so they must not outlive it
+    def __init__(self, file, mapped, sections):
+        self.file = file
+        self.mapped = mapped
+        self.sections = sections  # Name -> memoryview over the mapped bytes
+        self.views = []  # Int views handed out by ints(), released on close
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):  # Unmaps the snapshot; a view still exported elsewhere keeps only the mapping open
+        for view in self.views + list(self.sections.values()):
+            view.release()
+        try:
+            self.mapped.close()
+        except BufferError:
+            pass
+        self.file.close()
+
+    def ints(self, name):
+        view = self.sections[name].cast('i')
+        self.views.append(view)
+        return view
+
+    def text(self, name):
+        data = bytes(self.sections[name])
+        return data.decode().split('\n') if data else []
+
+    @property
+    def sentences(self):
+        return self.text('sentences')
+
+    @property
+    def queries(self):
+        return self.text('queries')
+
+    def symbol_table(self):
+        table = SymbolTable()
+        for name in self.text('symbols'):
+            table.intern(name)
+        return table
+
+    def definite_kb(self):  # PropDefiniteKB over the mapped rules and indexes
+        kb = PropDefiniteKB()
+        kb.symbols = self.symbol_table()
+        kb.clauses = RuleStore(self.ints('rules.heads'), self.ints('rules.premises'), self.ints('rules.offsets'))
+        kb.conclusion_index = SymbolIndex(self.ints('conclusions.offsets'), self.ints('conclusions.rules'))
+        kb.premise_index = SymbolIndex(self.ints('premises.offsets'), self.ints('premises.rules'))
+        for fact in self.ints('facts'):
+            kb.fact_counts[fact] = kb.fact_counts.get(fact, 0) + 1
+        kb.initial_facts = set(kb.fact_counts)
+        kb.inferred = set(kb.initial_facts)
+        return kb
+
+    def cnf_kb(self):  # PropKB over the mapped CNF clauses
+        kb = PropKB()
+        kb.symbols = self.symbol_table()
+        kb.clauses = ClauseStore(self.ints('cnf.literals'), self.ints('cnf.offsets'))
+        return kb
+
+
+# Function to map the snapshot at path; returns None if it is missing, unreadable, or not compiled from filename
+def load(path, filename):
+    try:
+        file = open(path, 'rb')
+    except OSError:
+        return None
+    try:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError):  # Empty file
+        file.close()
+        return None
+    view = memoryview(mapped)
+    try:
+        magic, version, byte_order, digest, count = HEADER.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION or byte_order != BYTE_ORDER:
+            raise ValueError("Incompatible snapshot")
+        if digest != source_hash(filename):
+            raise ValueError("Stale snapshot")
+        sections = {}
+        for k in range(count):
+            name, offset, size = ENTRY.unpack_from(view, HEADER.size + ENTRY.size * k)
+            sections[name.rstrip(b'\0').decode()] = view[offset:offset + size]
+    except (struct.error, ValueError):
+        view.release()
+        mapped.close()
+        file.close()
+        return None
+    return Snapshot(file, mapped, sections)
@@ -0,0 +1,110 @@
+import cProfile
+import io
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# Per-method work counters and phase timings, collected on request
+# Like tracing, collection is off unless a caller turns it on, and the engines fill in the Stats it returns:
+#     collected = stats.collect()
+#     kb.ask(query)
+#     print(collected.report())
+#     stats.stop()
+# An engine looks up the current Stats once per call and counts its loop work in locals, adding them when
+# it returns, so with collection off a call pays for one comparison and a loop pays nothing.
+# Phases are timed with `with stats.phase('cnf'):`, a no-op without collection.
+
+# Counters
+#   clauses_scanned   FC: rules visited through the premise index; BC: rules tried for a goal
+#   rules_fired       FC and BC: rules whose premises were all derived
+#   goals_memo_hit    BC: goals settled from the inferred, failed or tentative sets
+#   models_evaluated  TT: models the KB was evaluated in
+#   kb_models         TT: models of the KB
+#   pairs_resolved    RES: clause pairs taken up for resolution on a complementary literal
+#   resolvents        RES: new clauses kept from them
+#   clauses_subsumed  RES: clauses dropped by forward or backward subsumption
+#   conflicts         SAT: conflicts analysed by the solver
+# Phases: parse, cnf, forward_chain, backward_chain, enumerate, count, resolve, solve
+
+PROFILE_MODES = ['cpu', 'memory']
+PROFILE_LINES = 25  # Functions or allocation sites listed in a profile report
+
+current = None  # The Stats being filled in, None while collection is off
+NO_PHASE = nullcontext()  # Shared by every untimed phase, so timing nothing allocates nothing
+
+
+class Stats:
+    def __init__(self):
+        self.counters = {}
+        self.seconds = {}  # Phase -> wall time spent in it, summed over every time it ran
+
+    def add(self, **counts):
+        for name, count in counts.items():
+            self.counters[name] = self.counters.get(name, 0) + count
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def as_dict(self):
+        return {"seconds": dict(self.seconds), "counters": dict(self.counters)}
+
+    def report(self):  # One 'name: value' line per phase, then per counter
+        lines = [f"{name}: {seconds * 1000:.3f} ms" for name, seconds in self.seconds.items()]
+        lines += [f"{name}: {count}" for name, count in self.counters.items()]
+        return "\n".join(lines)
+
+
+# Function to start collecting into a fresh Stats, which is returned
+def collect():
+    global current
+    current = Stats()
+    return current
+
+def stop():
+    global current
+    current = None
+
+def phase(name):  # Times a block into the current Stats, if any
+    return current.phase(name) if current is not None else NO_PHASE
+
+# Function to run function under cProfile ('cpu') or tracemalloc ('memory') while collecting Stats,
+# then write a report of the phases, counters and profile to output (stderr by default)
+def profile(function, mode='cpu', output=None):
+    collected = collect()
+    profiler = cProfile.Profile() if mode == 'cpu' else None
+    if mode == 'memory':
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        if profiler is not None:
+            return profiler.runcall(function)
+        return function()
+    finally:
+        elapsed = time.perf_counter() - start
+        text = io.StringIO()
+        print(f"total: {elapsed * 1000:.3f} ms", file=text)
+        if collected.seconds or collected.counters:
+            print(collected.report(), file=text)
+        if profiler is not None:
+            print(file=text)
+            pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        else:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"peak memory: {peak // 1024} KiB\n", file=text)
+            for statistic in snapshot.statistics('lineno')[:PROFILE_LINES]:
+                print(statistic, file=text)
+        stop()
+        if output is None:
+            sys.stderr.write(text.getvalue())
+        else:
+            with open(output, 'w') as file:
+                file.write(text.getvalue())
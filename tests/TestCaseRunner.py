@@ -1,43 +1,19 @@
+import os
+import sys
 import unittest
-import subprocess
 
-class TestKnowledgeBase(unittest.TestCase):
-    def run_test_case(self, test_file, expected_output, method):
-        result = subprocess.run(["python", "main.py", test_file, method], capture_output=True, text=True)
-        output = result.stdout.strip()
-        test_result = output.split("\n")[-1]
-        self.assertEqual(test_result, expected_output, f"Test {test_file}: Expected {expected_output}, but got {test_result}")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import run_tests
 
-    def test_forward_chaining(self):
-        test_cases = [
-            ("test_cases/test1.txt", "YES: 1"),
-            ("test_cases/test2.txt", "NO"),
-            ("test_cases/test3.txt", "YES: 1"),
-            ("test_cases/test4.txt", "NO"),
-            ("test_cases/test5.txt", "YES: 1"),
-            ("test_cases/test6.txt", "YES: 1"),
-            ("test_cases/test7.txt", "YES: 1"),
-            ("test_cases/test8.txt", "YES: 1"),
-            
-        ]
-        for test_file, expected_output in test_cases:
-            with self.subTest(test_file=test_file, expected_output=expected_output):
-                self.run_test_case(test_file, expected_output, "FC")
+# unittest entry point of the regression driver in run_tests.py: one subtest per fixture, every method
+# answered in-process and the fixtures checked across a process pool.
+# Usage: python3 -m unittest tests/TestCaseRunner.py
 
-    def test_backward_chaining(self):
-        test_cases = [
-            ("test_cases/test1.txt", "YES: 1"),
-            ("test_cases/test2.txt", "NO"),
-            ("test_cases/test3.txt", "YES: 1"),
-            ("test_cases/test4.txt", "NO"),
-            ("test_cases/test5.txt", "YES: 1"),
-            ("test_cases/test6.txt", "YES: 1"),
-            ("test_cases/test7.txt", "YES: 1"),
-            ("test_cases/test8.txt", "YES: 1"),
-        ]
-        for test_file, expected_output in test_cases:
-            with self.subTest(test_file=test_file, expected_output=expected_output):
-                self.run_test_case(test_file, expected_output, "BC")
+class TestKnowledgeBase(unittest.TestCase):
+    def test_fixtures(self):
+        for name, problems in run_tests.run(run_tests.discover()):
+            with self.subTest(fixture=name):
+                self.assertEqual(problems, [], f"Test {name}: " + "; ".join(problems))
 
 if __name__ == '__main__':
     unittest.main()
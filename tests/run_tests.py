@@ -1,26 +1,140 @@
-import subprocess
-
-test_cases = [
-    ("test1.txt", "YES: 1"),
-    ("test2.txt", "NO"),
-    ("test3.txt", "YES: 1"),
-    ("test4.txt", "NO"),
-    ("test5.txt", "YES: 1"),
-    ("test6.txt", "YES: 1"),
-    ("test7.txt", "YES: 1"),
-    ("test8.txt", "YES: 1"),
-    # ("test_cases/test9.txt", "NO"),
-    ("test10.txt", "NO")
-    # ("test9.txt", "NO") # most comprehensive test case involving 392 details
-]
-
-for test_file, expected_output in test_cases:
-    result = subprocess.run(["python3", "../main.py", test_file, "TT"], capture_output=True, text=True)
-
-    output = result.stdout.strip()
-    test = output.split("\n")[-1]
-    print(f"Test {test_file}: {'PASS' if test == expected_output else 'FAIL'}")
-    if output != expected_output:
-        print(f"  Expected: {expected_output}")
-        print(f"  Got: {output}")
-        print()
\ No newline at end of file
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine import parse_file_queries
+from logic import SymbolTable, is_atom, parse, to_clauses
+from session import answer_file
+
+# Regression driver: answers every tests/*.txt fixture with every method in-process, one fixture per
+# task of a process pool, then checks the answers against each other and against the known outputs.
+#   - TT, RES, SAT and BDD decide entailment completely, so they must agree on every query
+#     (RES is left out when the KB has no models, where set of support gives no guarantee)
+#   - FC and BC must agree with each other and with TT on Horn fixtures, whose clauses all have exactly
+#     one positive literal and whose queries are conjunctions of symbols
+# Usage: python3 tests/run_tests.py [fixture ...] [--methods TT,FC,...] [--workers N]
+
+METHODS = ["TT", "FC", "BC", "RES", "SAT", "BDD"]
+COMPLETE_METHODS = ["TT", "RES", "SAT", "BDD"]
+CHAINING_METHODS = ["FC", "BC"]
+
+# Fixture -> method -> line main.py prints for its first query: TT everywhere, FC and BC on the Horn fixtures
+EXPECTED = {
+    "test1.txt": {"TT": "YES: 1", "FC": "YES: p, q", "BC": "YES: p, q"},
+    "test2.txt": {"TT": "NO", "FC": "NO", "BC": "NO"},
+    "test3.txt": {"TT": "YES: 1", "FC": "YES: p, q, r", "BC": "YES: p, q, r"},
+    "test4.txt": {"TT": "NO"},
+    "test5.txt": {"TT": "YES: 1", "FC": "YES: p, q", "BC": "YES: p, q"},
+    "test6.txt": {"TT": "YES: 1"},
+    "test7.txt": {"TT": "YES: 1", "FC": "YES: a, b, c, d", "BC": "YES: a, b, d"},
+    "test8.txt": {"TT": "YES: 1"},
+    "test9.txt": {"TT": "NO"},
+    "test10.txt": {"TT": "YES: 1", "FC": "YES: p, r, q, s", "BC": "YES: p, q, r, s"},
+    "test11.txt": {"TT": "NO", "FC": "NO", "BC": "NO"},
+    "BC_basic_derivation.txt": {"TT": "YES: 1", "FC": "YES: a, b", "BC": "YES: a, b"},
+    "BC_chaining_multiple_rules.txt": {"TT": "YES: 1", "FC": "YES: a, b, c, d", "BC": "YES: a, b, c, d"},
+    "BC_complex_dependencies.txt": {"TT": "YES: 1", "FC": "YES: a, b, c, x, y", "BC": "YES: a, b, x, c, y"},
+    "BC_cyclic_dependencies.txt": {"TT": "YES: 1", "FC": "YES: a, b", "BC": "YES: a, b"},
+    "BC_unmet_premise.txt": {"TT": "NO", "FC": "NO", "BC": "NO"},
+    "basic_chain_test.txt": {"TT": "YES: 1", "FC": "YES: A, B, C, D", "BC": "YES: A, B, C, D"},
+    "batch_queries_test.txt": {"TT": "YES: 3", "FC": "YES: a, c, b, d, e", "BC": "YES: a, b, c, d, e"},
+    "bc_negative_case.txt": {"TT": "NO", "FC": "NO", "BC": "NO"},
+    "circular_dependencies.txt": {"TT": "YES: 1", "FC": "YES: A, B", "BC": "YES: A, B"},
+    "complex_dependencies_test.txt": {"TT": "YES: 1", "FC": "YES: A, B, D, C, E", "BC": "YES: A, B, C, D, E"},
+    "crlf_line_endings_test.txt": {"TT": "YES: 1", "FC": "YES: a, d, b, c, e", "BC": "YES: a, b, c, d, e"},
+    "deep_nesting_test.txt": {"TT": "YES: 1", "FC": "YES: p, q, r", "BC": "YES: p, q, r"},
+    "large_knowledgebase_test.txt": {
+        "TT": "YES: 1",
+        "FC": "YES: A, B, C, D, E, F, G, H, I, J, K, L, M, N, O, P, Q, R, S, T, U, V, W, X, Y, Z",
+        "BC": "YES: A, B, C, D, E, F, G, H, I, J, K, L, M, N, O, P, Q, R, S, T, U, V, W, X, Y, Z"},
+    "multiline_tell_test.txt": {"TT": "YES: 3", "FC": "YES: a, b, p2, p3, p1, d", "BC": "YES: p2, p3, p1, d"},
+    "negations_falsepaths_test.txt": {"TT": "NO", "FC": "NO", "BC": "NO"},
+    "test_HornKB.txt": {"TT": "YES: 3", "FC": "YES: a, b, p2, p3, p1, d", "BC": "YES: p2, p3, p1, d"},
+    "test_genericKB.txt": {"TT": "NO"},
+    "test_genericKB_1.txt": {"TT": "YES: 3"},
+}
+# Fixture -> error expected while reading it
+EXPECTED_ERRORS = {
+    "empty_minimal_input_test.txt": "No TELL in file",
+}
+
+
+# Function to list the fixtures next to this script
+def discover():
+    return sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.txt")))
+
+# Function to tell whether FC and BC are complete on a KB: every clause is definite and every query a conjunction
+def is_horn(sentences, queries):
+    table = SymbolTable()
+    for sentence in sentences:
+        if any(sum(lit > 0 for lit in clause) != 1 for clause in to_clauses(parse(sentence, table))):
+            return False
+    for query in queries:
+        pending = [parse(query, table)]
+        while pending:
+            tree = pending.pop()
+            if not is_atom(tree):
+                if tree[0] != '&':
+                    return False
+                pending.extend(tree[1:])
+    return True
+
+# Function run in a pool worker: answers one fixture and returns (name, problems found)
+def check_fixture(path, methods):
+    name = os.path.basename(path)
+    try:
+        sentences, queries = parse_file_queries(path)
+        results = answer_file(path, methods)
+    except Exception as e:
+        expected = EXPECTED_ERRORS.get(name)
+        if expected is not None and str(e) == expected:
+            return name, []
+        return name, [f"error: {e}"]
+    if name in EXPECTED_ERRORS:
+        return name, [f"expected error: {EXPECTED_ERRORS[name]}"]
+
+    problems = []
+    answers = {(result.query, result.method): result for result in results}
+    for method, line in EXPECTED.get(name, {}).items():
+        result = answers.get((queries[0], method))
+        if result is not None and result.line != line:
+            problems.append(f"{method}: expected {line!r}, got {result.line!r}")
+    horn = is_horn(sentences, queries)
+    for query in queries:
+        complete = [method for method in COMPLETE_METHODS if (query, method) in answers]
+        compared = complete + ([method for method in CHAINING_METHODS if (query, method) in answers] if horn else [])
+        if len({answers[query, method].entailed for method in compared}) > 1:
+            problems.append(f"{query}: methods disagree: " + ", ".join(
+                f"{method} {'YES' if answers[query, method].entailed else 'NO'}" for method in compared))
+    return name, problems
+
+# Function to check the fixtures across a process pool, yielding (name, problems) in fixture order
+def run(paths, methods=METHODS, workers=None):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(check_fixture, paths, [methods] * len(paths))
+
+def main():
+    parser = argparse.ArgumentParser(description="Check every method on the test fixtures, in-process")
+    parser.add_argument("fixtures", nargs="*", help="fixture files (default: every tests/*.txt)")
+    parser.add_argument("--methods", default=",".join(METHODS), help="comma-separated methods to run")
+    parser.add_argument("--workers", type=int, help="processes checking fixtures in parallel (default: one per CPU)")
+    args = parser.parse_args()
+
+    paths = args.fixtures or discover()
+    failed = 0
+    for name, problems in run(paths, args.methods.split(","), args.workers):
+        print(f"{'FAIL' if problems else 'PASS'} {name}")
+        for problem in problems:
+            print(f"  {problem}")
+        failed += bool(problems)
+    print(f"{len(paths) - failed} of {len(paths)} fixtures passed")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+import random
+import sys
+import tempfile
+import unittest
+from itertools import product
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from counting import count_models, counted_truth_table
+from kbclass import BDDKB, PropKB, SATKB
+from logic import SymbolTable, evaluate, parse
+from research.resolution import resolution_proof
+
+# Tests of the complete entailment engines against brute-force enumeration of every model, on seeded
+# random KBs of up to seven symbols.
+# Usage: python3 -m unittest tests/test_engines.py
+
+
+# Function to make a random sentence of the given depth over symbols, using every connective
+def random_sentence(rng, symbols, depth):
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(symbols)
+    op = rng.choice(['~', '&', '|', '=>', '<=>'])
+    if op == '~':
+        return '~' + random_sentence(rng, symbols, depth - 1)
+    return '(' + random_sentence(rng, symbols, depth - 1) + f' {op} ' + random_sentence(rng, symbols, depth - 1) + ')'
+
+# Function to yield seeded random (sentences, query) cases
+def cases(seed, count=300):
+    rng = random.Random(seed)
+    for _ in range(count):
+        symbols = [f's{i}' for i in range(rng.randint(1, 7))]
+        yield [random_sentence(rng, symbols, 3) for _ in range(rng.randint(1, 4))], random_sentence(rng, symbols, 2)
+
+# Function to decide entailment by evaluating the KB and query in every model
+# Returns (entailed, number of KB models) as TT reports them: a KB without models answers NO
+def brute_force(sentences, query):
+    table = SymbolTable()
+    trees = [parse(sentence, table) for sentence in sentences]
+    query_tree = parse(query, table)
+    models = 0
+    entailed = True
+    for values in product([False, True], repeat=len(table)):
+        model = (None,) + values
+        if all(evaluate(tree, model) for tree in trees):
+            models += 1
+            entailed = entailed and evaluate(query_tree, model)
+    return entailed and models > 0, models
+
+
+class TestEnginesAgainstBruteForce(unittest.TestCase):
+    def test_resolution(self):
+        for sentences, query in cases(seed=5):
+            kb = PropKB()
+            for sentence in sentences:
+                kb.tell(sentence)
+            with self.subTest(sentences=sentences, query=query):
+                self.assertEqual(resolution_proof(kb, query)[0], brute_force(sentences, query)[0])
+
+    def test_resolution_inconsistent_kb(self):  # A KB without models answers NO whatever the query, as in TT
+        for sentences, query in [(["a", "a => b", "~b"], "a"), (["p", "~p"], "p"), (["p", "~p"], "~p")]:
+            kb = PropKB()
+            for sentence in sentences:
+                kb.tell(sentence)
+            with self.subTest(sentences=sentences, query=query):
+                self.assertEqual(resolution_proof(kb, query), (False, []))
+
+    def test_resolution_query_clause_in_kb(self):  # The negated query clause ~b is also a KB clause
+        kb = PropKB()
+        for sentence in ["~b", "a => c", "a"]:
+            kb.tell(sentence)
+        self.assertTrue(resolution_proof(kb, "b | c")[0])
+        self.assertFalse(resolution_proof(kb, "b")[0])
+
+    def test_sat(self):  # The query and its negation are asked of one solver, which keeps its learnt clauses
+        for sentences, query in cases(seed=6):
+            kb = SATKB()
+            for sentence in sentences:
+                kb.tell(sentence)
+            for asked in (query, f'~({query})'):
+                with self.subTest(sentences=sentences, query=asked):
+                    self.assertEqual(kb.ask(asked), brute_force(sentences, asked)[0])
+
+    def test_model_counting(self):
+        for sentences, query in cases(seed=7):
+            table = SymbolTable()
+            trees = [parse(sentence, table) for sentence in sentences]
+            with self.subTest(sentences=sentences, query=query):
+                self.assertEqual(counted_truth_table(trees, parse(query, table), table), brute_force(sentences, query))
+
+    def test_model_counting_long_chain(self):  # One decision per symbol, deeper than the recursion limit
+        n = 1000
+        chain = [[-k, k + 1] for k in range(1, n)]  # s1 => s2, s2 => s3, ...
+        self.assertEqual(count_models(chain, range(1, n + 1)), n + 1)
+
+    def test_bdd(self):  # Compiled KBs are also saved and loaded back before they answer
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "kb.bdd")
+            for sentences, query in cases(seed=8):
+                entailed, models = brute_force(sentences, query)
+                told = BDDKB()
+                for sentence in sentences:
+                    told.tell(sentence)
+                BDDKB.compile(sentences, path)
+                for kb in (told, BDDKB.compile(sentences, path)):
+                    with self.subTest(sentences=sentences, query=query):
+                        self.assertEqual(kb.ask(query), entailed)
+                        if entailed:
+                            self.assertEqual(kb.count(query), models)
+
+    def test_bdd_cache_not_writable(self):  # The cache path is a directory, so the KB is answered without saving it
+        with tempfile.TemporaryDirectory() as directory:
+            kb = BDDKB.compile(["a => b", "a"], directory)
+            self.assertTrue(kb.ask("b"))
+            self.assertEqual(kb.count(), 1)
+
+    def test_bdd_long_chain(self):  # ite descends one level per symbol, deeper than the recursion limit
+        n = 2000
+        kb = BDDKB.compile([f"s{k} => s{k + 1}" for k in range(n)] + ["s0"])
+        self.assertTrue(kb.ask(f"s{n}"))
+        self.assertEqual(kb.count(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from kbclass import PropDefiniteKB
+
+# Tests of incremental tell and retract on PropDefiniteKB: once saturated, the inferred set must always be
+# the closure a fresh KB over the sentences still told would derive.
+# Usage: python3 -m unittest tests/test_kb.py
+
+
+# Function to derive the closure of sentences from scratch, as symbol names
+def closure(sentences):
+    kb = PropDefiniteKB()
+    for sentence in sentences:
+        kb.tell(sentence)
+    kb.saturate()
+    return set(kb.names(kb.inferred))
+
+def saturated_kb(sentences):
+    kb = PropDefiniteKB()
+    for sentence in sentences:
+        kb.tell(sentence)
+    kb.saturate()
+    return kb
+
+
+class TestIncrementalKB(unittest.TestCase):
+    def test_random_updates_keep_the_closure(self):
+        rng = random.Random(3)
+        for trial in range(300):
+            symbols = [f"s{i}" for i in range(rng.randint(3, 10))]
+            pool = symbols + [" & ".join(rng.sample(symbols, rng.randint(1, 3))) + " => " + rng.choice(symbols)
+                              for _ in range(10)]
+            kb = PropDefiniteKB()
+            told = []
+            saturate_at = rng.randint(0, 5)
+            for step in range(40):
+                if step == saturate_at:
+                    kb.saturate()
+                if told and rng.random() < 0.4:
+                    sentence = rng.choice(told)
+                    told.remove(sentence)
+                    kb.retract(sentence)
+                else:
+                    sentence = rng.choice(pool)
+                    told.append(sentence)
+                    kb.tell(sentence)
+                if kb.saturated:
+                    with self.subTest(trial=trial, step=step, told=told):
+                        self.assertEqual(set(kb.names(kb.inferred)), closure(told))
+
+    def test_fact_copies(self):  # A fact told twice stays until both copies are retracted
+        kb = saturated_kb(["a", "a", "a => b"])
+        kb.retract("a")
+        self.assertEqual(set(kb.names(kb.inferred)), {"a", "b"})
+        kb.retract("a")
+        self.assertEqual(kb.inferred, set())
+        self.assertEqual(kb.fact_counts, {})
+
+    def test_retracted_rules_are_tombstoned(self):
+        kb = saturated_kb(["a", "a => b", "a => b", "b => c"])
+        kb.retract("a => b")  # One copy of the rule is left, so b and c stay derived
+        self.assertEqual(set(kb.names(kb.inferred)), {"a", "b", "c"})
+        self.assertEqual([rule is None for rule in kb.clauses], [True, False, False])
+        kb.retract("a => b")
+        self.assertEqual(set(kb.names(kb.inferred)), {"a"})
+        kb.tell("a => b")  # Told again, the rule takes a new position and the other positions stay valid
+        self.assertEqual(len(kb.clauses), 4)
+        self.assertEqual(set(kb.names(kb.inferred)), {"a", "b", "c"})
+
+    def test_retract_keeps_alternative_derivations(self):
+        kb = saturated_kb(["a", "b", "a => c", "b => c", "c => d"])
+        kb.retract("a => c")
+        self.assertEqual(set(kb.names(kb.inferred)), {"a", "b", "c", "d"})
+        kb.retract("b")
+        self.assertEqual(set(kb.names(kb.inferred)), {"a"})
+
+    def test_cycles_are_not_self_supporting(self):  # c and d support each other but lose their only outside support
+        kb = saturated_kb(["a", "a => c", "c => d", "d => c"])
+        kb.retract("a => c")
+        self.assertEqual(set(kb.names(kb.inferred)), {"a"})
+
+if __name__ == '__main__':
+    unittest.main()
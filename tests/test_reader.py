@@ -0,0 +1,41 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from engine import KBReader
+import run_tests
+
+# Tests of the streaming TELL/ASK reader: every fixture must read the same whatever the block size, so
+# sentences, separators and the ASK line split across blocks are put back together.
+# Usage: python3 -m unittest tests/test_reader.py
+
+
+# Function to read a file with the given block size, returning (sentences, queries) or the error message
+def read(path, block_size=None):
+    try:
+        with KBReader(path, *([block_size] if block_size else [])) as reader:
+            return list(reader.sentences()), reader.queries()
+    except ValueError as e:
+        return str(e)
+
+
+class TestKBReader(unittest.TestCase):
+    def test_block_boundaries(self):
+        for path in run_tests.discover():
+            expected = read(path)
+            for block_size in range(1, 9):
+                with self.subTest(fixture=os.path.basename(path), block_size=block_size):
+                    self.assertEqual(read(path, block_size), expected)
+
+    def test_multiline_sentences(self):
+        directory = os.path.dirname(os.path.abspath(__file__))
+        self.assertEqual(read(os.path.join(directory, "multiline_tell_test.txt")), (
+            ["p2 => p3", "p3 => p1", "c => e", "b & e => f", "f & g => h", "p1   => d", "p1 & p3 => c", "a", "b", "p2"],
+            ["d"]))
+        self.assertEqual(read(os.path.join(directory, "crlf_line_endings_test.txt")), (
+            ["a => b", "b => c", "c & d => e", "a", "d"], ["e"]))
+
+if __name__ == '__main__':
+    unittest.main()
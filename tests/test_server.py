@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import server
+
+# Tests of the inference server: requests go over a Unix socket to an in-process server with one pool worker.
+# Usage: python3 -m unittest tests/test_server.py
+
+KBS = {"chain": ["A => B", "B => C", "C => D", "A"]}
+
+
+class TestInferenceServer(unittest.TestCase):
+    def exchange(self, requests):  # Sends the requests in order on one connection, returning the decoded responses
+        async def run(path):
+            inference = server.InferenceServer(KBS, workers=1)
+            serving = asyncio.create_task(inference.serve(path))
+            try:
+                while not os.path.exists(path):
+                    await asyncio.sleep(0.01)
+                reader, writer = await asyncio.open_unix_connection(path)
+                responses = []
+                for request in requests:
+                    writer.write((request if isinstance(request, str) else json.dumps(request)).encode() + b"\n")
+                    await writer.drain()
+                    responses.append(json.loads(await reader.readline()))
+                writer.close()
+                return responses
+            finally:
+                serving.cancel()
+                try:
+                    await serving
+                except asyncio.CancelledError:
+                    pass
+                inference.close()
+
+        with tempfile.TemporaryDirectory() as directory:
+            return asyncio.run(run(os.path.join(directory, "kb.sock")))
+
+    def test_updates(self):
+        responses = self.exchange([
+            {"id": 1, "op": "ask", "kb": "chain", "query": "D", "method": "FC"},
+            {"id": 2, "op": "retract", "kb": "chain", "sentence": "B  =>  C"},
+            {"op": "ask", "kb": "chain", "query": "D", "method": "FC"},
+            {"op": "ask", "kb": "chain", "query": "D", "method": "TT"},
+            {"op": "tell", "kb": "chain", "sentence": "B=>C"},
+            {"op": "ask", "kb": "chain", "query": "D", "method": "TT"},
+            {"op": "ask", "kb": "chain", "query": "D", "method": "RES"},
+            {"op": "ask", "kb": "chain", "query": "D", "method": "BC"},
+            {"op": "retract", "kb": "chain", "sentence": "B => C"},  # Told as B=>C
+            {"op": "ask", "kb": "chain", "query": "D", "method": "FC"},
+        ])
+        self.assertEqual(responses[0], {"id": 1, "ok": True, "entailed": True, "line": "YES: A, B, C, D",
+                                        "count": None, "derived": ["A", "B", "C", "D"]})
+        self.assertEqual(responses[1], {"id": 2, "ok": True})
+        self.assertEqual([response.get("line") for response in responses[2:]],
+                         ["NO", "NO", None, "YES: 1", "YES", "YES: A, B, C, D", None, "NO"])
+
+    def test_errors(self):
+        responses = self.exchange([
+            {"op": "tell", "kb": "chain", "sentence": "A => => B"},
+            {"op": "ask", "kb": "chain", "query": "D", "method": "SAT"},
+            {"op": "retract", "kb": "chain", "sentence": "X => Y"},
+            {"op": "ask", "kb": "nope", "query": "D"},
+            {"op": "ask", "kb": "chain", "query": "D", "method": "XX"},
+            {"op": "ask", "kb": "chain"},
+            "not json",
+        ])
+        self.assertFalse(responses[0]["ok"])
+        self.assertEqual(responses[1]["line"], "YES")  # The malformed tell left the KB as it was
+        self.assertEqual([response["error"] for response in responses[2:6]],
+                         ["Sentence not in KB: X => Y", "Unknown KB: nope", "Unsupported Method: XX",
+                          "Missing field: query"])
+        self.assertFalse(responses[6]["ok"])
+
+    def test_pooled_ask_needs_sentences_once_per_version(self):
+        server.worker_sessions.clear()
+        self.assertIsNone(server.pooled_ask("chain", 0, "D", "TT"))
+        self.assertTrue(server.pooled_ask("chain", 0, "D", "TT", tuple(KBS["chain"])).entailed)
+        self.assertTrue(server.pooled_ask("chain", 0, "D", "RES").entailed)  # Reuses the session of version 0
+        self.assertIsNone(server.pooled_ask("chain", 1, "D", "TT"))
+
+if __name__ == '__main__':
+    unittest.main()
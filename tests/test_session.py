@@ -0,0 +1,62 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from session import KBSession
+
+# Tests of the persistent KB session: told and retracted sentences must leave every engine answering
+# as a fresh session over the same sentences would.
+# Usage: python3 -m unittest tests/test_session.py
+
+METHODS = ["TT", "FC", "BC", "RES", "SAT", "BDD"]
+
+
+# Function to make a random Horn sentence over n symbols: a fact or a rule with one to three premises
+def horn_sentence(rng, n):
+    symbol = lambda: f"x{rng.randrange(n)}"
+    if rng.random() < 0.3:
+        return symbol()
+    return " & ".join(symbol() for _ in range(rng.randint(1, 3))) + " => " + symbol()
+
+
+class TestSessionUpdates(unittest.TestCase):
+    def test_malformed_tell_changes_nothing(self):
+        session = KBSession(["a => b", "a"])
+        before = [session.ask("b", method).line for method in METHODS]  # Builds every engine
+        with self.assertRaises(SyntaxError):
+            session.tell("a => => b")
+        self.assertEqual(session.sentences, ["a => b", "a"])
+        self.assertEqual([session.ask("b", method).line for method in METHODS], before)
+
+    def test_forward_chaining_order_after_updates(self):  # The derivation printed must be that of a fresh run
+        rng = random.Random(1)
+        for _ in range(200):
+            n = rng.randint(3, 8)
+            sentences = [horn_sentence(rng, n) for _ in range(rng.randint(1, 10))]
+            session = KBSession(list(sentences))
+            session.ask("x0", "FC")
+            for _ in range(6):
+                if sentences and rng.random() < 0.4:
+                    sentence = rng.choice(sentences)
+                    sentences.remove(sentence)
+                    session.retract(sentence)
+                else:
+                    sentence = horn_sentence(rng, n)
+                    sentences.append(sentence)
+                    session.tell(sentence)
+                fresh = KBSession(list(sentences))
+                for _ in range(3):
+                    query = " & ".join(f"x{rng.randrange(n)}" for _ in range(rng.randint(1, 2)))
+                    with self.subTest(sentences=sentences, query=query):
+                        self.assertEqual(session.ask(query, "FC").line, fresh.ask(query, "FC").line)
+
+    def test_retract_unknown_sentence(self):
+        session = KBSession(["a"])
+        with self.assertRaises(ValueError):
+            session.retract("b")
+        self.assertEqual(session.ask("a", "FC").line, "YES: a")
+
+if __name__ == '__main__':
+    unittest.main()
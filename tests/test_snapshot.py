@@ -0,0 +1,51 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import server
+import snapshot
+
+# Tests of the compiled KB snapshots: a loaded snapshot answers as the file it was compiled from, and
+# closing it unmaps the file even while KBs built over it are still referenced.
+# Usage: python3 -m unittest tests/test_snapshot.py
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.filename = os.path.join(directory, "kb.txt")
+        shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_HornKB.txt"), self.filename)
+        snapshot.compile_file(self.filename, self.filename + snapshot.SUFFIX)
+
+    def test_close_unmaps(self):
+        with snapshot.load(self.filename + snapshot.SUFFIX, self.filename) as loaded:
+            kb = loaded.definite_kb()
+            kb.set_method("FC")
+            self.assertTrue(kb.forward_chain("d"))
+            cnf = loaded.cnf_kb()
+            self.assertEqual(len(cnf.clauses), 10)
+        self.assertTrue(loaded.mapped.closed)
+        self.assertTrue(loaded.file.closed)
+
+    def test_read_sentences_closes_the_snapshot(self):
+        opened = []
+        load = snapshot.load
+
+        def recording_load(path, filename):
+            opened.append(load(path, filename))
+            return opened[-1]
+
+        snapshot.load = recording_load
+        try:
+            sentences = server.read_sentences(self.filename)
+        finally:
+            snapshot.load = load
+        self.assertEqual(len(sentences), 10)
+        self.assertTrue(opened[0].mapped.closed)
+
+if __name__ == '__main__':
+    unittest.main()
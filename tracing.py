@@ -0,0 +1,62 @@
+import sys
+from logic import SymbolTable, clause_text
+
+# Level-gated structured tracing shared by every inference method
+# An engine asks for a tracer once, before its loop, and calls it only when it is not None:
+#     trace = tracing.tracer(tracing.INFO)
+#     ...
+#     if trace is not None:
+#         trace(tracing.RULE_FIRED, symbol=conclusion, rule=i)
+# With tracing off the loop pays for one comparison, and no event or text is ever built.
+# Events carry raw values; only the sink decides whether and how to format them.
+
+OFF, INFO, DEBUG = 0, 1, 2
+LEVELS = {'off': OFF, 'info': INFO, 'debug': DEBUG}
+
+# Events
+FACT_ADDED = 'fact_added'  # symbol
+RULE_FIRED = 'rule_fired'  # symbol, premises
+GOAL_ATTEMPTED = 'goal_attempted'  # goal
+RULE_TRIED = 'rule_tried'  # goal, premises
+GOAL_PROVEN = 'goal_proven'  # goal, premises (None when it was already inferred)
+GOAL_FAILED = 'goal_failed'  # goal, premises (None once every rule concluding it failed)
+MODEL_ACCEPTED = 'model_accepted'  # model
+CLAUSE_RESOLVED = 'clause_resolved'  # left, right, resolvent, symbols (to name the clause literals)
+
+level = OFF
+sink = None
+
+
+class Recorder:  # Sink keeping every event as (event, fields), for tests and tools
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event, fields):
+        self.events.append((event, fields))
+
+
+# Function to write an event as one 'event key=value ...' line on stderr
+def write_event(event, fields):
+    symbols = fields.get('symbols')
+    if isinstance(symbols, SymbolTable):  # Clauses of signed symbol ids are written as disjunctions
+        fields = {key: clause_text(value, symbols) if isinstance(value, frozenset) else value
+                  for key, value in fields.items() if key != 'symbols'}
+    print(event, *(f"{key}={value}" for key, value in fields.items()), file=sys.stderr)
+
+# Function to turn tracing on at a level, sending events to sink (stderr lines by default)
+def enable(new_level=INFO, new_sink=None):
+    global level, sink
+    level = new_level
+    sink = new_sink or write_event
+
+def disable():
+    global level, sink
+    level = OFF
+    sink = None
+
+# Function to get the emitter for events of the given level, or None if they are not traced
+def tracer(event_level):
+    return emit if level >= event_level else None
+
+def emit(event, **fields):
+    sink(event, fields)